@@ -15,6 +15,7 @@ from data_api.routers.waste_alarms import alarm_endpoint
 from data_api.routers.waste_impurity import impurity_endpoint
 from data_api.routers.waste_segments import segments_endpoint
 from data_api.routers.waste_feedback import feecback_endpoint
+from data_api.routers.waste_delivery import delivery_endpoint
 
 def create_app() -> FastAPI:
     tags_meta = [
@@ -48,9 +49,11 @@ def create_app() -> FastAPI:
     )
 
     app.include_router(alarm_endpoint.router)
-    app.include_router(impurity_endpoint.router)
     app.include_router(segments_endpoint.router)
     app.include_router(feecback_endpoint.router)
+    app.include_router(delivery_endpoint.router)
+    # last, /api/v1/{event} would match /api/v1/segments
+    app.include_router(impurity_endpoint.router)
     
     return app
 
@@ -18,6 +18,8 @@ from fastapi.routing import APIRoute
 
 from .queries import metadata
 from .queries import data
+from .queries import stream
+from .queries import stats
 from .queries import data_by_event_id 
 
 
@@ -46,4 +48,7 @@ router = APIRouter(
 
 router.include_router(metadata.router)
 router.include_router(data.router)
+# before data_by_event_id, /alarm/{event_uid} would match /alarm/stream and /alarm/stats
+router.include_router(stream.router)
+router.include_router(stats.router)
 router.include_router(data_by_event_id.router)
\ No newline at end of file
@@ -3,7 +3,7 @@ import time
 import math
 import django
 from django.db import connection
-from django.db.models import Q
+from django.db.models import Q, Count, Max
 from fastapi import status
 from datetime import datetime
 from datetime import timedelta
@@ -18,7 +18,10 @@ from fastapi.routing import APIRoute
 django.setup()
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import PlantInfo, EdgeBoxInfo, WasteAlarm
-from metadata.models import Filter
+from metadata.cache import compiled_filters
+from utils.pagination import keyset_page
+from utils.response_cache import cached_response
+from utils.etag import conditional, make_etag
 
 
 DATE_FORMAT = "%Y-%m-%d"
@@ -57,6 +60,7 @@ descrption = """
         to_date (query parameter, optional): The end date (in UTC) for filtering the alarm events. If not provided, the default is the day after from_date.
         items_per_page (query parameter, optional): The number of alarm items to be displayed per page. Defaults to 15 if not provided.
         page (query parameter, optional): The page number to retrieve. Defaults to 1 if not provided.
+        cursor (query parameter, optional): Switches to cursor pagination. Pass an empty cursor (cursor=) for the first page, then the next_cursor or prev_cursor of the previous response. Every page costs the same however deep it is, and alarms created meanwhile are neither repeated nor skipped. page is ignored and total_record / pages are not returned in this mode.
 
     Response:
 
@@ -73,11 +77,19 @@ descrption = """
                 filters: The filters applied in the query.
                 pages: The total number of pages based on items_per_page.
                 items: The alarms returned for the current page.
+                next_cursor / prev_cursor: In cursor mode, the cursors of the older and newer pages. Polling prev_cursor returns the alarms created since the page was read.
             Status: "ok" with status description "OK".
 
+            Headers:
+                ETag: A validator of the alarms matching the parameters. Send it back in If-None-Match to get an empty 304 Not Modified response while no alarm was added or removed.
+
+        Not Modified (304):
+            Returned if If-None-Match matches the current ETag.
+
         Error Responses:
             400 (Bad Request):
                 If items_per_page is set to 0 or a negative value, a 400 error is returned with a message about division by zero.
+                If the cursor is invalid or a filter has no value.
             404 (Not Found):
                 Returned if no matching alarm records are found for the specified filters.
                 Error details include status_code: "non-matching-query" or status_code: "not found".
@@ -108,27 +120,51 @@ descrption = """
             filters = event=impurity & severity_level__gt=2  --> query mentioned events that have severtity_level greater to 2
             filters = event=impurity & severity_level=2  --> query mentioned events that have severtity_level exactly equal to 2
             filters = event=all&severity_level__in=1,3  --> query all events that have severtity_level 1 or 3
+            
+        Filters that are not active and lookups other than those listed above are ignored.
     
 """
 
 
+def date_range(from_date:datetime=None, to_date:datetime=None):
+    today = datetime.today()
+    
+    if from_date is None:
+        from_date = datetime(today.year, today.month, today.day)
+    
+    if to_date is None:
+        to_date = from_date + timedelta(days=1)
+        
+    from_date = from_date.replace(tzinfo=timezone.utc)
+    to_date = to_date.replace(tzinfo=timezone.utc) + timedelta(days=1)
+    
+    return from_date, to_date
+
+
+def alarm_etag(filters:str="", from_date:datetime=None, to_date:datetime=None, **params):
+    """
+    ETag of GET /alarm: the parameters and the count, last created_at and last id of the alarms
+    matching them, read in one aggregate query.
+    """
+    from_date, to_date = date_range(from_date, to_date)
+    try:
+        lookup_filters = Q(created_at__range=(from_date, to_date)) & compiled_filters(filters)
+    except ValueError:
+        return None
+
+    stats = WasteAlarm.objects.filter(lookup_filters).aggregate(count=Count('id'), last=Max('created_at'), last_id=Max('id'))
+    return make_etag(filters, from_date, to_date, params, stats)
+
+
 @router.api_route(
     "/alarm", methods=["GET"], tags=["Alarms"], description=descrption
 )
-def get_alarm(response: Response, filters:str="", from_date:datetime=None, to_date:datetime=None, items_per_page:int=15, page:int=1):
+@conditional(alarm_etag)
+@cached_response('alarm')
+def get_alarm(response: Response, filters:str="", from_date:datetime=None, to_date:datetime=None, items_per_page:int=15, page:int=1, cursor:str=None):
     results = {}
     try:
-        today = datetime.today()
-        given_filters = {s.split('=')[0]: s.split('=')[1].split(',') for s in filters.split('&') if len(s)}
-        
-        if from_date is None:
-            from_date = datetime(today.year, today.month, today.day)
-        
-        if to_date is None:
-            to_date = from_date + timedelta(days=1)
-            
-        from_date = from_date.replace(tzinfo=timezone.utc)
-        to_date = to_date.replace(tzinfo=timezone.utc) + timedelta(days=1)
+        from_date, to_date = date_range(from_date, to_date)
         
         
         if page < 1:
@@ -144,24 +180,43 @@ def get_alarm(response: Response, filters:str="", from_date:datetime=None, to_da
             response.status_code = status.HTTP_400_BAD_REQUEST    
             return results
     
-        filters = Filter.objects.filter(is_active=True)
-        filters = [
-            f.filter_name for f in filters
-        ]
+        try:
+            # the active filter names and the compiled query string are cached, see metadata.cache
+            given_filters = compiled_filters(filters)
+        except ValueError as err:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, invalid filters',
+                'detail': str(err),
+            }
+
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
         
         lookup_filters = Q()
         lookup_filters &= Q(created_at__range=(from_date, to_date ))
-        for g_filter in given_filters.keys():
-            key = g_filter.split('__')[0]
-            if not key in filters:
-                continue
-            
-            if len(given_filters[g_filter])>1:
-                lookup_filters &= Q((g_filter, given_filters[g_filter]))
-            else:
-                lookup_filters &= Q((g_filter, given_filters[g_filter][0]))
+        lookup_filters &= given_filters
                 
-        waste_alarm = WasteAlarm.objects.filter(lookup_filters).order_by('-created_at')
+        waste_alarm = WasteAlarm.objects.filter(lookup_filters).only('created_at', 'meta_info', 'event', 'severity_level')
+        if cursor is not None:
+            try:
+                waste_alarm, next_cursor, prev_cursor = keyset_page(waste_alarm, cursor=cursor, limit=items_per_page)
+            except ValueError as err:
+                results['error'] = {
+                    'status_code': 400,
+                    'status_description': f'Bad Request, invalid cursor',
+                    'detail': str(err),
+                }
+
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return results
+        else:
+            waste_alarm = waste_alarm.order_by('-created_at', '-id')
+            total_record = waste_alarm.count()
+            
+            offset = (page - 1) * items_per_page
+            waste_alarm = waste_alarm[offset:offset + items_per_page]
+        
         data = [
             {
                 "date": wa.created_at.strftime(DATE_FORMAT),
@@ -173,14 +228,22 @@ def get_alarm(response: Response, filters:str="", from_date:datetime=None, to_da
             } for wa in waste_alarm
         ]
         
-        total_record = len(waste_alarm)
-        results['data'] = {
-            "type": "collection",
-            "total_record": total_record,
-            "filters": lookup_filters,
-            "pages": math.ceil(total_record / items_per_page),
-            "items": data[(page - 1) * items_per_page:page * items_per_page]
-        }
+        if cursor is not None:
+            results['data'] = {
+                "type": "collection",
+                "filters": lookup_filters,
+                "items": data,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        else:
+            results['data'] = {
+                "type": "collection",
+                "total_record": total_record,
+                "filters": lookup_filters,
+                "pages": math.ceil(total_record / items_per_page),
+                "items": data,
+            }
         
         results['status_code'] = "ok"
         results["detail"] = "data retrieved successfully"
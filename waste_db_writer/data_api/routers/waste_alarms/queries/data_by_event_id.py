@@ -19,6 +19,7 @@ django.setup()
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import PlantInfo, EdgeBoxInfo, WasteAlarm
 from metadata.models import Filter
+from utils.response_cache import cached_response
 
 
 DATE_FORMAT = "%Y-%m-%d"
@@ -91,6 +92,7 @@ descrption = """
 @router.api_route(
     "/alarm/{event_uid}", methods=["GET"], tags=["Alarms"], description=descrption
 )
+@cached_response('alarm_by_event_uid')
 def get_alarm_by_event_id(response: Response, event_uid:str):
     results = {}
     try:        
@@ -3,7 +3,7 @@ import time
 import math
 import django
 from django.db import connection
-from django.db.models import Q
+from django.db.models import Q, Prefetch
 from fastapi import status
 from datetime import datetime
 from datetime import timedelta
@@ -20,6 +20,8 @@ django.setup()
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import PlantInfo, EdgeBoxInfo, WasteImpurity, WasteDust, WasteHotSpot
 from metadata.models import Metadata, MetadataColumn, MetadataLocalization, Filter, FilterItem, FilterItemLocalization, FilterLocalization
+from metadata.cache import metadata_cache
+from utils.etag import conditional, make_etag
 
 
 class TimedRoute(APIRoute):
@@ -61,6 +63,7 @@ Responses:
             filters: A list of filters, including localized filter names, types, descriptions, and filter items.
             primary_key: The primary key of the Metadata object for the given metadata_id.
         Includes a status code "ok" and detailed success message.
+        The ETag header is a hash of the document. Send it back in If-None-Match to get an empty 304 Not Modified response while the metadata is unchanged.
 
     Error Responses (HTTP 404):
         Metadata Not Found: If no metadata is found for the given metadata_id, the response returns an error indicating that the metadata was not found.
@@ -72,116 +75,119 @@ Responses:
 
 """
 
-@router.api_route(
-    "/alarm/metadata/{language}", methods=["GET"], tags=["Alarms"], description=description,
-)
-def get_alarm_metadata(response: Response, language:str="de", metadata_id:int=1):
-    results = {}
-    try:
-        if not MetadataColumn.objects.filter(metadata_id=metadata_id).exists():
-            results = {
-                "error": {
-                    "status_code": "not found",
-                    "status_description": f"Metadata ID {metadata_id} not found",
-                    "deatil": f"Metadata ID {metadata_id} not found",
-                }
-            }
-            
-            response.status_code = status.HTTP_404_NOT_FOUND
-            return results
-
-        col = []
-        columns = MetadataColumn.objects.filter(metadata_id=metadata_id).select_related('metadata').prefetch_related('localizations')        
-        for column in columns:
-            localization = column.localizations.filter(language=language).first()
-            if not localization:
-                results = {
-                    "error": {
-                        "status_code": "not found",
-                        "status_description": f"language {language} not found",
-                        "deatil": f"language {language} not found",
-                    }
-                }
-                
-                response.status_code = status.HTTP_404_NOT_FOUND
-                return results
-            
-            col.append(
-                {
-                    column.column_name: {
-                        "title": localization.title,
-                        "type": column.type,
-                        "description": localization.description                        
-                    }
+def not_found(description):
+    return status.HTTP_404_NOT_FOUND, {
+        "error": {
+            "status_code": "not found",
+            "status_description": description,
+            "deatil": description,
+        }
+    }
 
-                }
-            )
-            
-        _filters = []
-        filters = Filter.objects.filter(is_active=True).prefetch_related('localizations')
-        for fil in filters:
-            localization = fil.localizations.filter(language=language).first()
-            if not localization:
-                results = {
-                    "error": {
-                        "status_code": "not found",
-                        "status_description": f"language {language} for filter {fil.filter_name} not found",
-                        "deatil": f"language {language} for filter {fil.filter_name} not found",
-                    }
-                }
-                
-                response.status_code = status.HTTP_404_NOT_FOUND
-                return results 
-        
-            if not FilterItem.objects.filter(filter=fil, is_active=True).exists():
-                results = {
-                    "error": {
-                        "status_code": "not found",
-                        "status_description": f" filter items for {fil.filter_name} not found",
-                        "deatil": f"filter item for {fil.filter_name} not found",
-                    }
-                }
-                
-                response.status_code = status.HTTP_404_NOT_FOUND
-                return results 
+
+def build_alarm_metadata(metadata_id:int, language:str):
+    """
+    Build the localized metadata document of metadata_id, as (http status, results). The
+    localizations are prefetched for the language only, so the document costs a fixed number of
+    queries whatever the number of columns, filters and filter items.
+    """
+    localized = lambda model: Prefetch('localizations', queryset=model.objects.filter(language=language), to_attr='localized')
+    
+    columns = list(
+        MetadataColumn.objects.filter(metadata_id=metadata_id).select_related('metadata').prefetch_related(localized(MetadataLocalization))
+    )
+    if not columns:
+        return not_found(f"Metadata ID {metadata_id} not found")
+
+    col = []
+    for column in columns:
+        if not column.localized:
+            return not_found(f"language {language} not found")
         
-            filter_items = FilterItem.objects.filter(filter=fil, is_active=True).prefetch_related('localizations')
-            items = {}
-            for fil_item in filter_items:
-                filter_item_loc = fil_item.localizations.filter(language=language).first()
-                if not filter_item_loc:
-                    results = {
-                        "error": {
-                            "status_code": "not found",
-                            "status_description": f"language {language} for filter item {fil_item.item_key} not found",
-                            "deatil": f"language {language} for filter item {fil_item.item_key} not found",
-                        }
-                    }
-                    
-                    response.status_code = status.HTTP_404_NOT_FOUND
-                    return results 
-
-                items[fil_item.item_key] = filter_item_loc.item_value
-            
-            _filters.append({
-                fil.filter_name: {
+        localization = column.localized[0]
+        col.append(
+            {
+                column.column_name: {
                     "title": localization.title,
-                    "type": fil.type,
-                    "description": localization.description,
-                    "items": items,
+                    "type": column.type,
+                    "description": localization.description                        
                 }
-            })
+
+            }
+        )
         
-        results = {
-            "columns": col,
-            "filters": _filters,
-            "primary_key": Metadata.objects.get(id=metadata_id).primary_key
-        }
+    _filters = []
+    filters = Filter.objects.filter(is_active=True).prefetch_related(
+        localized(FilterLocalization),
+        Prefetch(
+            'items',
+            queryset=FilterItem.objects.filter(is_active=True).prefetch_related(localized(FilterItemLocalization)),
+            to_attr='active_items',
+        ),
+    )
+    for fil in filters:
+        if not fil.localized:
+            return not_found(f"language {language} for filter {fil.filter_name} not found")
         
-        results['status_code'] = "ok"
-        results["detail"] = "data retrieved successfully"
-        results["status_description"] = "OK"
+        if not fil.active_items:
+            return not_found(f"filter items for {fil.filter_name} not found")
+    
+        localization = fil.localized[0]
+        items = {}
+        for fil_item in fil.active_items:
+            if not fil_item.localized:
+                return not_found(f"language {language} for filter item {fil_item.item_key} not found")
+
+            items[fil_item.item_key] = fil_item.localized[0].item_value
+        
+        _filters.append({
+            fil.filter_name: {
+                "title": localization.title,
+                "type": fil.type,
+                "description": localization.description,
+                "items": items,
+            }
+        })
     
+    results = {
+        "columns": col,
+        "filters": _filters,
+        "primary_key": columns[0].metadata.primary_key,
+        "status_code": "ok",
+        "detail": "data retrieved successfully",
+        "status_description": "OK",
+    }
+    
+    return status.HTTP_200_OK, results
+
+
+def alarm_metadata(metadata_id:int, language:str):
+    """
+    Return (http status, results, etag) of the metadata document. The document only changes when
+    metadata is edited, it is cached until metadata.signals invalidates it.
+    """
+    def build():
+        status_code, results = build_alarm_metadata(metadata_id=metadata_id, language=language)
+        return status_code, results, make_etag(results)
+    
+    return metadata_cache.get((metadata_id, language), build)
+
+
+def alarm_metadata_etag(language:str="de", metadata_id:int=1):
+    status_code, _, etag = alarm_metadata(metadata_id=metadata_id, language=language)
+    return etag if status_code == status.HTTP_200_OK else None
+
+
+@router.api_route(
+    "/alarm/metadata/{language}", methods=["GET"], tags=["Alarms"], description=description,
+)
+@conditional(alarm_metadata_etag)
+def get_alarm_metadata(response: Response, language:str="de", metadata_id:int=1):
+    results = {}
+    try:
+        status_code, results, _ = alarm_metadata(metadata_id=metadata_id, language=language)
+        response.status_code = status_code
+        results = dict(results)
         
     except ObjectDoesNotExist as e:
         results['error'] = {
@@ -0,0 +1,176 @@
+import time
+import django
+from django.db.models import Q, Sum, Max
+from django.db.models.functions import TruncHour, TruncDay
+from fastapi import status
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+
+django.setup()
+from django.core.exceptions import FieldError
+from database.models import AlarmRollup
+from metadata.cache import compiled_filters
+from utils.response_cache import cached_response
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+INTERVALS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+# group_by name: rollup field
+GROUPS = {
+    'event': 'event',
+    'edge_box': 'edge_box__edge_box_id',
+    'region': 'region',
+    'severity_level': 'severity_level',
+}
+
+description = """
+
+    API Description: GET /alarm/stats
+    Purpose:
+
+    This API endpoint returns the number of alarms per hour or per day, optionally per event, edge box, region and severity level, for histograms and trends. It reads the hourly alarm rollups, a year of data is a few thousand rows, instead of counting the alarms.
+    Parameters:
+
+        filters (query parameter, optional): The filter conditions of GET /alarm, e.g. event=impurity,dust&severity_level__gte=2. Only the filters on event, edge_box, region and severity_level apply to the rollups.
+        from_date (query parameter, optional): The start date (in UTC). Defaults to the current day if not provided.
+        to_date (query parameter, optional): The end date (in UTC), included. Defaults to the day after from_date if not provided.
+        interval (query parameter, optional): hour (default) or day.
+        group_by (query parameter, optional): Comma separated dimensions among event, edge_box, region and severity_level. Defaults to event, empty for the total per interval.
+
+    Response:
+
+        Success (200):
+            A collection of buckets ordered by time. Each item contains:
+                bucket: The start of the hour or day, in UTC.
+                event, edge_box, region, severity_level: The dimensions of group_by.
+                count: The number of alarms.
+                max_severity: The highest severity level of the alarms.
+
+        Error Responses:
+            400 (Bad Request):
+                If a filter has no value or does not apply to the rollups, or interval or group_by is unknown.
+            500 (Internal Server Error):
+                Returned if an unexpected server error occurs during the request, with details provided in the response.
+"""
+
+
+@router.api_route(
+    "/alarm/stats", methods=["GET"], tags=["Alarms"], description=description,
+)
+# past hours are rebuilt by compact_alarm_rollups, which bumps the generation
+@cached_response('alarm_stats', always_live=True)
+def get_alarm_stats(response: Response, filters:str="", from_date:datetime=None, to_date:datetime=None, interval:str="hour", group_by:str="event"):
+    results = {}
+    try:
+        groups = [g.strip() for g in group_by.split(',') if g.strip()]
+        if interval not in INTERVALS or any(g not in GROUPS for g in groups):
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, unknown interval {interval} or group_by {group_by}',
+                'detail': f"interval should be one of {', '.join(INTERVALS)} and group_by among {', '.join(GROUPS)}",
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        today = datetime.today()
+
+        if from_date is None:
+            from_date = datetime(today.year, today.month, today.day)
+
+        if to_date is None:
+            to_date = from_date + timedelta(days=1)
+
+        from_date = from_date.replace(tzinfo=timezone.utc)
+        to_date = to_date.replace(tzinfo=timezone.utc) + timedelta(days=1)
+
+        try:
+            lookup_filters = Q(bucket__gte=from_date, bucket__lt=to_date) & compiled_filters(filters)
+            rows = list(
+                AlarmRollup.objects.filter(lookup_filters)
+                .annotate(period=INTERVALS[interval]('bucket'))
+                .values('period', *[GROUPS[g] for g in groups])
+                .annotate(count=Sum('count'), max_severity=Max('severity_level'))
+                .order_by('period', *[GROUPS[g] for g in groups])
+            )
+        except (ValueError, FieldError) as err:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, invalid filters',
+                'detail': str(err),
+            }
+
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        items = []
+        for row in rows:
+            item = {'bucket': row['period'].strftime(DATETIME_FORMAT)}
+            for g in groups:
+                item[g] = row[GROUPS[g]]
+            if 'region' in item:
+                item['region'] = item['region'] or None
+            item['count'] = row['count']
+            item['max_severity'] = row['max_severity']
+            items.append(item)
+
+        results['data'] = {
+            "type": 'collection',
+            "interval": interval,
+            "total_record": len(items),
+            "items": items,
+        }
+
+        results['status_code'] = "ok"
+        results["detail"] = "data retrieved successfully"
+        results["status_description"] = "OK"
+
+    except HTTPException as e:
+        results['error'] = {
+            "status_code": "not found",
+            "status_description": "Request not Found",
+            "detail": f"{e}",
+        }
+
+        response.status_code = status.HTTP_404_NOT_FOUND
+
+    except Exception as e:
+        results['error'] = {
+            'status_code': 'server-error',
+            "status_description": "Internal Server Error",
+            "detail": str(e),
+        }
+
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    return results
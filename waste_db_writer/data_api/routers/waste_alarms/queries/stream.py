@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque
+import django
+from django.db import connection
+from django.db.models import Q, Max
+from fastapi import status
+from typing import Callable, Optional
+from fastapi import Header
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+django.setup()
+from database.models import WasteAlarm
+from metadata.cache import compiled_filters
+from utils.alarm_stream import notifier
+
+DATE_FORMAT = "%Y-%m-%d"
+TIME_FORMAT = "%H:%M:%S"
+KEEPALIVE = float(os.environ.get('ALARM_STREAM_KEEPALIVE', 15.))
+REPLAY_LIMIT = int(os.environ.get('ALARM_STREAM_REPLAY_LIMIT', 1000))
+
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+description = """
+
+    API Description: GET /alarm/stream
+    Purpose:
+
+    This API endpoint pushes alarm events as they are created, as Server-Sent Events. A dashboard keeps one connection open instead of polling GET /alarm.
+    Parameters:
+
+        filters (query parameter, optional): The filter conditions of GET /alarm, e.g. event=impurity,dust&severity_level__gte=2.
+        Last-Event-ID (header, optional): The id of the last event received. The alarms created since are sent first, at most 1000. Browsers send it when they reconnect. Without it only new alarms are sent.
+
+    Response:
+
+        Success (200):
+            A text/event-stream. Each alarm is an event of type "alarm" whose id is the alarm id and whose data is a JSON object with:
+                event_uid: The event uid of the alarm.
+                date, start, end, location, event, severity_level: As in the items of GET /alarm.
+            A comment line is sent every 15 seconds while no alarm is created.
+
+        Error Responses:
+            400 (Bad Request):
+                If a filter has no value or Last-Event-ID is not an alarm id.
+"""
+
+
+def alarm_event(wa):
+    data = {
+        "event_uid": wa.event_uid,
+        "date": wa.created_at.strftime(DATE_FORMAT),
+        "start": wa.created_at.strftime(TIME_FORMAT),
+        "end": wa.created_at.strftime(TIME_FORMAT),
+        "location": wa.meta_info.get('location') if wa.meta_info else None,
+        "event": wa.event,
+        "severity_level": wa.severity_level,
+    }
+    return f"id: {wa.id}\nevent: alarm\ndata: {json.dumps(data)}\n\n"
+
+def last_alarm_id():
+    try:
+        return WasteAlarm.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+    finally:
+        connection.close()
+
+def new_alarms(lookup_filters, last_id, ids=()):
+    """
+    Return the alarms matching lookup_filters created after last_id, or listed in ids, which
+    catches an alarm committed after one with a higher id.
+    """
+    try:
+        return list(
+            WasteAlarm.objects.filter(lookup_filters).filter(Q(id__gt=last_id) | Q(id__in=ids))
+            .only('event_uid', 'created_at', 'meta_info', 'event', 'severity_level').order_by('id')[:REPLAY_LIMIT]
+        )
+    finally:
+        connection.close()
+
+
+@router.api_route(
+    "/alarm/stream", methods=["GET"], tags=["Alarms"], description=description,
+)
+async def stream_alarms(request: Request, filters:str="", last_event_id:Optional[str]=Header(None)):
+    try:
+        # reads the active filters on a cache miss
+        lookup_filters = await run_in_threadpool(compiled_filters, filters)
+        last_id = int(last_event_id) if last_event_id else None
+    except ValueError as err:
+        return Response(
+            content=json.dumps({
+                'error': {
+                    'status_code': 400,
+                    'status_description': f'Bad Request, invalid filters or Last-Event-ID',
+                    'detail': str(err),
+                }
+            }),
+            status_code=status.HTTP_400_BAD_REQUEST,
+            media_type='application/json',
+        )
+
+    queue = notifier.subscribe()
+
+    async def events(last_id):
+        try:
+            if last_id is None:
+                last_id = await run_in_threadpool(last_alarm_id)
+
+            ids = []
+            # a notified alarm may have been read already by the query on last_id
+            sent = deque(maxlen=REPLAY_LIMIT)
+            while True:
+                for wa in await run_in_threadpool(new_alarms, lookup_filters, last_id, ids):
+                    if wa.id in sent:
+                        continue
+                    last_id = max(last_id, wa.id)
+                    sent.append(wa.id)
+                    yield alarm_event(wa)
+
+                while True:
+                    try:
+                        ids = list(await asyncio.wait_for(queue.get(), timeout=KEEPALIVE))
+                        break
+                    except asyncio.TimeoutError:
+                        if await request.is_disconnected():
+                            return
+                        yield ": keepalive\n\n"
+
+                # notifications received meanwhile are read with one query
+                while not queue.empty():
+                    ids.extend(queue.get_nowait())
+        finally:
+            notifier.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(last_id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,45 @@
+import os
+import time
+import math
+import django
+from fastapi import status
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from .queries import data
+
+
+django.setup()
+from django.core.exceptions import ObjectDoesNotExist
+from database.models import DeliverySummary
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+    
+
+router = APIRouter(
+    prefix="/api/v1",
+    tags=["Delivery"],
+    route_class=TimedRoute,
+    responses={404: {"description": "Not found"}},
+)
+
+router.include_router(data.router)
@@ -0,0 +1,258 @@
+import time
+import django
+from fastapi import status
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+
+django.setup()
+from django.core.exceptions import ObjectDoesNotExist
+from database.models import DeliverySummary
+from utils.pagination import keyset_page
+from utils.response_cache import cached_response
+from utils.delivery_summary import EVENT_MODELS
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+
+description = """
+
+    API Description: GET /delivery/{delivery_id}
+    Purpose:
+
+    This API endpoint returns the summary of a delivery: the time range of its events, the number of impurity, dust and hotspot events, the highest severity level, the longest object and a representative image. It reads one row of the delivery summaries kept up to date by the writers, instead of scanning the events of the delivery.
+    Parameters:
+
+        delivery_id (path parameter, required): The delivery.
+
+    Response:
+
+        Success (200):
+            The summary of the delivery:
+                delivery_id: The delivery.
+                edge_box_id: The edge box of the first event of the delivery.
+                first_seen, last_seen: The timestamps of the first and last events.
+                counts: The number of impurity, dust and hotspot events.
+                max_severity: The highest severity level of the events.
+                event_uid, image, image_id: The first event of the highest severity level and its image.
+                longest_object, longest_object_uid: The length and object_uid of the longest impurity.
+                pages: The URL of the first page of the events of each type, see GET /delivery/{delivery_id}/{event}.
+
+        Error Responses:
+            404 (Not Found):
+                If the delivery has no event.
+            500 (Internal Server Error):
+                Returned if an unexpected server error occurs during the request, with details provided in the response.
+"""
+
+
+@router.api_route(
+    "/delivery/{delivery_id}", methods=["GET"], tags=["Delivery"], description=description,
+)
+@cached_response('delivery')
+def get_delivery_summary(response: Response, delivery_id:str):
+    results = {}
+    try:
+        summary = DeliverySummary.objects.select_related('edge_box').get(delivery_id=delivery_id)
+
+        results['data'] = {
+            "type": "object",
+            "item": {
+                "delivery_id": summary.delivery_id,
+                "edge_box_id": summary.edge_box.edge_box_id if summary.edge_box else None,
+                "first_seen": summary.first_seen.strftime(DATETIME_FORMAT),
+                "last_seen": summary.last_seen.strftime(DATETIME_FORMAT),
+                "counts": {
+                    "impurity": summary.impurity_count,
+                    "dust": summary.dust_count,
+                    "hotspot": summary.hotspot_count,
+                },
+                "max_severity": summary.max_severity,
+                "event_uid": summary.event_uid,
+                "image": summary.img_file,
+                "image_id": summary.img_id,
+                "longest_object": summary.longest_object,
+                "longest_object_uid": summary.longest_object_uid,
+                "pages": {
+                    event: f"/api/v1/delivery/{delivery_id}/{event}?cursor=" for event in EVENT_MODELS
+                },
+            },
+        }
+
+        results['status_code'] = "ok"
+        results["detail"] = "data retrieved successfully"
+        results["status_description"] = "OK"
+
+    except ObjectDoesNotExist as e:
+        results['error'] = {
+            'status_code': "non-matching-query",
+            'status_description': f'Matching query was not found',
+            'detail': f"matching query does not exist. {e}"
+        }
+
+        response.status_code = status.HTTP_404_NOT_FOUND
+
+    except HTTPException as e:
+        results['error'] = {
+            "status_code": "not found",
+            "status_description": "Request not Found",
+            "detail": f"{e}",
+        }
+
+        response.status_code = status.HTTP_404_NOT_FOUND
+
+    except Exception as e:
+        results['error'] = {
+            'status_code': 'server-error',
+            "status_description": "Internal Server Error",
+            "detail": str(e),
+        }
+
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    return results
+
+
+description_events = """
+
+    API Description: GET /delivery/{delivery_id}/{event}
+    Purpose:
+
+    This API endpoint returns the impurity, dust or hotspot events of a delivery page by page, newest first, the details behind the counts of GET /delivery/{delivery_id}.
+    Parameters:
+
+        delivery_id (path parameter, required): The delivery.
+        event (path parameter, required): impurity, dust or hotspot.
+        cursor (query parameter, optional): Empty (default) for the first page, then the next_cursor or prev_cursor of the previous response.
+        items_per_page (query parameter, optional): The number of events per page. Defaults to 15.
+
+    Response:
+
+        Success (200):
+            A page of events. Each event contains:
+                event_uid: The event.
+                severity_level: The severity level of the event.
+                timestamp: The time the event was recorded.
+                region: The region of the event.
+                image, image_id: The image of the event.
+                object_uid, object_length: For an impurity, the object and its length.
+            Includes next_cursor / prev_cursor, the cursors of the older and newer pages.
+
+        Error Responses:
+            400 (Bad Request):
+                If the event is unknown, the cursor is invalid or items_per_page is not positive.
+            500 (Internal Server Error):
+                Returned if an unexpected server error occurs during the request, with details provided in the response.
+"""
+
+
+def delivery_event_row(event, row):
+    item = {
+        'event_uid': row.event_uid,
+        'severity_level': row.severity_level,
+        'timestamp': row.timestamp.strftime(DATETIME_FORMAT),
+        # dust and hotspot events keep the region of the edge box in meta_info
+        'region': getattr(row, 'region', None) or (row.meta_info or {}).get('region'),
+        'image': row.img_file,
+        'image_id': row.img_id,
+    }
+    if event == 'impurity':
+        item['object_uid'] = row.object_uid.object_uid
+        item['object_length'] = row.object_uid.object_length
+    return item
+
+
+@router.api_route(
+    "/delivery/{delivery_id}/{event}", methods=["GET"], tags=["Delivery"], description=description_events,
+)
+@cached_response('delivery_events')
+def get_delivery_events(response: Response, delivery_id:str, event:str, cursor:str="", items_per_page:int=15):
+    results = {}
+    try:
+        if not event in EVENT_MODELS:
+            results['error'] = {
+                "status_code": "bad-request",
+                "status_description": f"event {event} not found",
+                "detail": f"event should be one of {', '.join(EVENT_MODELS)}",
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        if items_per_page<=0:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, items_per_pages should not be 0',
+                'detail': "items_per_page should be positive.",
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        waste_event = EVENT_MODELS[event].objects.filter(delivery_id=delivery_id)
+        if event == 'impurity':
+            waste_event = waste_event.select_related('object_uid')
+
+        try:
+            waste_event, next_cursor, prev_cursor = keyset_page(waste_event, cursor=cursor, limit=items_per_page)
+        except ValueError as err:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, invalid cursor',
+                'detail': str(err),
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        results['data'] = {
+            "type": 'collection',
+            "event": event,
+            "items": [delivery_event_row(event, row) for row in waste_event],
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+        results['status_code'] = "ok"
+        results["detail"] = "data retrieved successfully"
+        results["status_description"] = "OK"
+
+    except HTTPException as e:
+        results['error'] = {
+            "status_code": "not found",
+            "status_description": "Request not Found",
+            "detail": f"{e}",
+        }
+
+        response.status_code = status.HTTP_404_NOT_FOUND
+
+    except Exception as e:
+        results['error'] = {
+            'status_code': 'server-error',
+            "status_description": "Internal Server Error",
+            "detail": str(e),
+        }
+
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    return results
@@ -20,7 +20,7 @@ from pydantic import BaseModel
 
 django.setup()
 from django.core.exceptions import ObjectDoesNotExist
-from database.models import PlantInfo, EdgeBoxInfo, WasteImpurity, WasteDust, WasteHotSpot, WasteFeedback
+from database.models import PlantInfo, EdgeBoxInfo, WasteImpurity, WasteDust, WasteHotSpot, WasteFeedback, EventRegistry
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -132,6 +132,13 @@ description = """
 """
 
 
+event_models = {
+    'impurity': WasteImpurity,
+    'dust': WasteDust,
+    'hotspot': WasteHotSpot,
+}
+
+
 class Request(BaseModel):
     user_id:Optional[str] = None
     comment:Optional[str] = None
@@ -146,17 +153,8 @@ def insert_feedback(response: Response, event_uid:str, request:Request = Depends
     results = {}
     try:
         
-        e_model = None
-        event = 'unknown'
-        events_model = [WasteImpurity, WasteDust, WasteHotSpot]
-        exists = False
-        for event_model in events_model:
-            if event_model.objects.filter(event_uid=event_uid).exists():
-                exists = True
-                event = event_model._meta.model_name
-                e_model = event_model.objects.get(event_uid=event_uid)
-                continue
-        
+        registry = EventRegistry.objects.filter(event_uid=event_uid).first()
+        exists = registry is not None
         if not exists:
             results['error'] = {
                 'status_code': "non-matching-query",
@@ -167,46 +165,37 @@ def insert_feedback(response: Response, event_uid:str, request:Request = Depends
             response.status_code = status.HTTP_404_NOT_FOUND
             return results
         
+        event = event_models[registry.event]._meta.model_name
         user_id = request.user_id
-        if WasteFeedback.objects.filter(event_uid=event_uid, user_id=user_id).exists():
-            waste_feedback = WasteFeedback.objects.get(event_uid=event_uid, user_id=user_id)
-            if request.ack_status is not None:
-                waste_feedback.ack_status = request.ack_status
-            
-            if request.comment:
-                waste_feedback.comment = request.comment
-                
-            if request.rating:
-                waste_feedback.rating = request.rating
-                            
-            if request.meta_info:
-                waste_feedback.meta_info = request.meta_info
-                
-        else:
-            waste_feedback = WasteFeedback()
-            waste_feedback.event_uid = event_uid
-            waste_feedback.event = event
-            waste_feedback.user_id = user_id
-            waste_feedback.ack_status = False
-            waste_feedback.rating = 0
-
-            if request.ack_status:
-                waste_feedback.ack_status = request.ack_status           
-
-            if waste_feedback.ack_status:
-                waste_feedback.rating = e_model.severity_level
-
-            if request.comment:
-                waste_feedback.comment = request.comment
-                
-            if request.rating:
-                waste_feedback.rating = request.rating
+        now = datetime.now(tz=timezone.utc)
+        
+        updates = {}
+        if request.ack_status is not None:
+            updates['ack_status'] = request.ack_status
+        
+        if request.comment:
+            updates['comment'] = request.comment
             
-            if request.meta_info:
-                waste_feedback.meta_info = request.meta_info
-                
-        waste_feedback.updated_at = datetime.now(tz=timezone.utc)
-        waste_feedback.save()
+        if request.rating:
+            updates['rating'] = request.rating
+                        
+        if request.meta_info:
+            updates['meta_info'] = request.meta_info
+        
+        # one UPDATE for an existing feedback, an INSERT otherwise
+        updated = WasteFeedback.objects.filter(event_uid=event_uid, user_id=user_id).update(updated_at=now, **updates)
+        if not updated:
+            ack_status = bool(request.ack_status)
+            WasteFeedback.objects.create(
+                event_uid=event_uid,
+                event=event,
+                user_id=user_id,
+                ack_status=ack_status,
+                comment=request.comment or None,
+                rating=request.rating or (registry.severity_level if ack_status else 0),
+                meta_info=request.meta_info or None,
+                updated_at=now,
+            )
         
         results = {
             'event_uid': event_uid,
@@ -17,6 +17,9 @@ from utils.convertor import poly2xyxy
 django.setup()
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import PlantInfo, EdgeBoxInfo, WasteImpurity, WasteSegments, WasteHotSpot, WasteDust
+from utils.pagination import keyset_page
+from utils.response_cache import cached_response
+from utils.export import export_response, FORMATS
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -58,6 +61,9 @@ description = """
         to_date (query parameter, optional): The end date (in UTC) for filtering impurity data. If not provided, the default is the day after from_date.
         delivery_id (query parameter, optional): If provided, the API filters impurity data by this delivery_id and returns only records marked as problematic (is_problematic=True).
         plant_id (query parameter, optional): This can be an additional parameter for further filtering by plant, though it is not used in this implementation (it can be added later if necessary).
+        cursor (query parameter, optional): Switches to cursor pagination, newest first. Pass an empty cursor (cursor=) for the first page, then the next_cursor or prev_cursor of the previous response. total_record and pages are not returned in this mode.
+        items_per_page (query parameter, optional): The number of records per page in cursor mode. Defaults to 15.
+        format (query parameter, optional): json (default), ndjson or csv. ndjson and csv stream every matching record, newest first, as a file download without pagination, whatever the size of the range.
 
     Response:
 
@@ -72,8 +78,11 @@ description = """
                 total_record: The total number of records returned.
                 pages: The number of pages available based on the default items_per_page (15).
                 items: The current page's records.
+                next_cursor / prev_cursor: In cursor mode, the cursors of the older and newer pages.
 
         Error Responses:
+            400 (Bad Request):
+                If the event is unknown, the cursor or format is invalid or items_per_page is not positive.
             404 (Not Found):
                 If no matching impurity records are found for the specified filters or date range, a 404 error is returned with a message indicating that no matching query was found.
             500 (Internal Server Error):
@@ -89,13 +98,25 @@ description = """
 
 """
 
+FIELDNAMES = ['severity_level', 'timestamp', 'image', 'image_id', 'delivery_id']
+
+def event_row(wi):
+    return {
+        'severity_level': wi.severity_level,
+        'timestamp': wi.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'image': wi.img_file,
+        'image_id': wi.img_id,
+        'delivery_id': wi.delivery_id,
+    }
+
 
 @router.api_route(
     "/{event}", methods=["GET"], tags=["Impurity"], description=description,
 )
-def get_impurity_data(response: Response, event:str, from_date:datetime=None, to_date:datetime=None, delivery_id:str=None, plant_id:str=None):
+@cached_response('event')
+def get_impurity_data(response: Response, event:str, from_date:datetime=None, to_date:datetime=None, delivery_id:str=None, plant_id:str=None,
+                      cursor:str=None, items_per_page:int=15, format:str="json"):
     results = {}
-    items_per_page = 15
     try:
         
         if not event in event_mapping:
@@ -107,6 +128,25 @@ def get_impurity_data(response: Response, event:str, from_date:datetime=None, to
             response.status_code = status.HTTP_400_BAD_REQUEST
             return results
         
+        if format != "json" and format not in FORMATS:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, unknown format {format}',
+                'detail': f"format should be one of json, {', '.join(FORMATS)}",
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+        
+        if items_per_page<=0:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, items_per_pages should not be 0',
+                'detail': "division by zero."
+            }
+
+            response.status_code = status.HTTP_400_BAD_REQUEST    
+            return results
+        
         
         WASTE_EVENT = event_mapping.get(event)
                 
@@ -125,25 +165,44 @@ def get_impurity_data(response: Response, event:str, from_date:datetime=None, to
             waste_event = WASTE_EVENT.objects.filter(created_at__range=(from_date, to_date )).order_by('-created_at')
         else:
             waste_event = WASTE_EVENT.objects.filter(delivery_id=delivery_id).order_by('-created_at')
+        
+        if format in FORMATS:
+            return export_response(
+                waste_event, event_row, format, FIELDNAMES,
+                filename=f"{event}_{delivery_id or from_date.strftime('%Y%m%d')}",
+            )
+        
+        if cursor is not None:
+            try:
+                waste_event, next_cursor, prev_cursor = keyset_page(waste_event, cursor=cursor, limit=items_per_page)
+            except ValueError as err:
+                results['error'] = {
+                    'status_code': 400,
+                    'status_description': f'Bad Request, invalid cursor',
+                    'detail': str(err),
+                }
+
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return results
+        else:
+            total_record = len(waste_event)
             
-        total_record = len(waste_event)
-            
-        rows = [
-            {
-                'severity_level': wi.severity_level,
-                'timestamp': wi.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'image': wi.img_file,
-                'image_id': wi.img_id,
-                'delivery_id': wi.delivery_id,
-            } for wi in waste_event
-        ]
+        rows = [event_row(wi) for wi in waste_event]
             
-        results['data'] = {
-            "type": 'collection',
-            "total_record": total_record,
-            "pages": math.ceil(total_record / items_per_page),
-            "items": rows,
-        }
+        if cursor is not None:
+            results['data'] = {
+                "type": 'collection',
+                "items": rows,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        else:
+            results['data'] = {
+                "type": 'collection',
+                "total_record": total_record,
+                "pages": math.ceil(total_record / items_per_page),
+                "items": rows,
+            }
         
         results['status_code'] = "ok"
         results["detail"] = "data retrieved successfully"
@@ -18,6 +18,8 @@ from utils.common import map_object_to_gate, rois
 django.setup()
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import PlantInfo, EdgeBoxInfo, WasteSegments
+from utils.pagination import keyset_page
+from utils.export import export_response, FORMATS
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -51,6 +53,9 @@ description = """
         from_date (query parameter, optional): The start date (in UTC) for filtering segment data. Defaults to the current day if not provided.
         to_date (query parameter, optional): The end date (in UTC) for filtering segment data. Defaults to the day after from_date if not provided.
         delivery_id (query parameter, optional): If provided, the API filters segment data by this delivery_id.
+        cursor (query parameter, optional): Switches to cursor pagination, oldest first by creation time. Pass an empty cursor (cursor=) for the first page, then the next_cursor or prev_cursor of the previous response. Polling next_cursor returns the segments created since. total_record and pages are not returned in this mode.
+        items_per_page (query parameter, optional): The number of records per page in cursor mode. Defaults to 15.
+        format (query parameter, optional): json (default), ndjson or csv. ndjson and csv stream every matching segment, oldest first, as a file download without pagination, whatever the size of the range. In csv, xyn and xyxyn are JSON encoded.
 
     Response:
 
@@ -61,13 +66,16 @@ description = """
                 object_length: The length of the segment object.
                 object_area: The area of the segment object.
                 xyn: The original polygon coordinates of the object.
-                xyxyn: The converted XY coordinates of the object (transformed using poly2xyxy).
+                xyxyn: The bounding box of the object (xmin, ymin, xmax, ymax), computed when the segment is written.
             Includes metadata:
                 total_record: The total number of records returned.
                 pages: The number of pages available based on items_per_page (default 15).
                 items: The current page's records.
+                next_cursor / prev_cursor: In cursor mode, the cursors of the newer and older pages.
 
         Error Responses:
+            400 (Bad Request):
+                If the cursor or format is invalid or items_per_page is not positive.
             404 (Not Found):
                 Returned if no matching segment records are found for the specified filters or date range.
                 Error details include status_code: "non-matching-query" or status_code: "not found".
@@ -84,14 +92,48 @@ description = """
 
 """
 
+FIELDNAMES = ['object_uid', 'timestamp', 'object_length', 'object_area', 'xyn', 'xyxyn']
+
+def segment_row(wi):
+    xyn = wi.object_polygon
+    return {
+        'object_uid': wi.object_uid,
+        'timestamp': wi.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'object_length': wi.object_length,
+        'object_area': wi.object_area,
+        'xyn': xyn,
+        # rows written before the bounding box columns are converted on read
+        'xyxyn': (wi.xmin, wi.ymin, wi.xmax, wi.ymax) if wi.xmin is not None else poly2xyxy(xyn),
+    }
+
 
 @router.api_route(
     "/segments", methods=["GET"], tags=["Segments"], description=description,
 )
-def get_segments_data(response: Response, from_date:datetime=None, to_date:datetime=None, delivery_id:str=None):
+def get_segments_data(response: Response, from_date:datetime=None, to_date:datetime=None, delivery_id:str=None, cursor:str=None, items_per_page:int=15,
+                      format:str="json"):
     results = {}
-    items_per_page = 15
     try:
+        if format != "json" and format not in FORMATS:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, unknown format {format}',
+                'detail': f"format should be one of json, {', '.join(FORMATS)}",
+            }
+
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        if items_per_page<=0:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, items_per_pages should not be 0',
+                'detail': "division by zero."
+            }
+
+            response.status_code = status.HTTP_400_BAD_REQUEST    
+            return results
+        
         today = datetime.today()
 
         if from_date is None:
@@ -107,31 +149,44 @@ def get_segments_data(response: Response, from_date:datetime=None, to_date:datet
             waste_segments = WasteSegments.objects.filter(timestamp__range=(from_date, to_date )).order_by('timestamp')
         else:
             waste_segments = WasteSegments.objects.filter(delivery_id=delivery_id).order_by('timestamp')
-            
-        rows = []
-        total_record = len(waste_segments)
         
-        for wi in waste_segments:
-            xyn = wi.object_polygon
-            xyxyn = poly2xyxy(xyn)
-            
-            row = {
-                'object_uid': wi.object_uid,
-                'timestamp': wi.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                'object_length': wi.object_length,
-                'object_area': wi.object_area,
-                'xyn': xyn,
-                'xyxyn': xyxyn,
+        if format in FORMATS:
+            return export_response(
+                waste_segments, segment_row, format, FIELDNAMES,
+                filename=f"segments_{delivery_id or from_date.strftime('%Y%m%d')}",
+            )
+        
+        if cursor is not None:
+            try:
+                waste_segments, next_cursor, prev_cursor = keyset_page(waste_segments, cursor=cursor, limit=items_per_page, descending=False)
+            except ValueError as err:
+                results['error'] = {
+                    'status_code': 400,
+                    'status_description': f'Bad Request, invalid cursor',
+                    'detail': str(err),
+                }
+
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return results
+        else:
+            total_record = len(waste_segments)
+        
+        rows = [segment_row(wi) for wi in waste_segments]
+        
+        if cursor is not None:
+            results['data'] = {
+                "type": 'collection',
+                "items": rows,
+                "next_cursor": next_cursor,
+                "prev_cursor": prev_cursor,
+            }
+        else:
+            results['data'] = {
+                "type": 'collection',
+                "total_record": total_record,
+                "pages": math.ceil(total_record / items_per_page),
+                "items": rows,
             }
-            
-            rows.append(row)
-            
-        results['data'] = {
-            "type": 'collection',
-            "total_record": total_record,
-            "pages": math.ceil(total_record / items_per_page),
-            "items": rows,
-        }
         
         results['status_code'] = "ok"
         results["detail"] = "data retrieved successfully"
@@ -0,0 +1,139 @@
+import time
+import django
+from fastapi import status
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi.routing import APIRoute
+from fastapi.responses import StreamingResponse
+
+django.setup()
+from utils.export import stream_from_thread
+from utils.columnar import TABLES, FORMATS, MEDIA_TYPES, QueueSink, require_pyarrow, write_table
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+
+description = """
+
+    API Description: GET /export/{table}
+    Purpose:
+
+    This API endpoint exports the rows of WasteSegments or WasteImpurity within a specified date range as a single Parquet or Arrow IPC file, for analytics in pandas, polars or duckdb. The file is streamed while it is written, by chunks of rows, so the size of the range does not matter. For months of data, the export_columnar management command writes files partitioned by day and edge box instead.
+    Parameters:
+
+        table (path parameter): segments or impurity.
+        from_date (query parameter, optional): The start date (in UTC) of the creation time. Defaults to the current day if not provided.
+        to_date (query parameter, optional): The end date (in UTC), included. Defaults to from_date if not provided.
+        delivery_id (query parameter, optional): If provided, only the rows of this delivery_id are exported, whatever the dates.
+        edge_box_id (query parameter, optional): If provided, only the rows of this edge box are exported.
+        format (query parameter, optional): parquet (default) or arrow.
+
+    Response:
+
+        Success (200):
+            A file download with one row per record, ordered by creation time. The columns are the fields of the table, with:
+                edge_box_id: The edge box of the record.
+                polygon: The polygon of the object, as a list<list<float64>> of (x, y) vertices.
+                xmin, ymin, xmax, ymax: The bounding box of the polygon, null if the polygon is empty.
+
+        Error Responses:
+            400 (Bad Request):
+                If the table or format is unknown.
+            501 (Not Implemented):
+                If pyarrow is not installed.
+"""
+
+
+@router.api_route(
+    "/export/{table}", methods=["GET"], tags=["Segments"], description=description,
+)
+def export_table(response: Response, table:str, from_date:datetime=None, to_date:datetime=None, delivery_id:str=None, edge_box_id:str=None,
+                 format:str="parquet"):
+    results = {}
+    try:
+        if table not in TABLES or format not in FORMATS:
+            results['error'] = {
+                'status_code': 400,
+                'status_description': f'Bad Request, unknown table {table} or format {format}',
+                'detail': f"table should be one of {', '.join(TABLES)} and format one of {', '.join(FORMATS)}",
+            }
+            response.status_code = status.HTTP_400_BAD_REQUEST
+            return results
+
+        require_pyarrow()
+
+        today = datetime.today()
+
+        if from_date is None:
+            from_date = datetime(today.year, today.month, today.day)
+
+        if to_date is None:
+            to_date = from_date
+
+        from_date = from_date.replace(tzinfo=timezone.utc)
+        to_date = to_date.replace(tzinfo=timezone.utc) + timedelta(days=1)
+
+        if delivery_id is None:
+            rows = TABLES[table].objects.filter(created_at__gte=from_date, created_at__lt=to_date)
+        else:
+            rows = TABLES[table].objects.filter(delivery_id=delivery_id)
+
+        if edge_box_id is not None:
+            rows = rows.filter(edge_box__edge_box_id=edge_box_id)
+
+        rows = rows.order_by('created_at', 'id')
+
+        def produce(put):
+            sink = QueueSink(put)
+            write_table(table, rows, format, sink)
+            sink.close()
+
+        filename = f"{table}_{delivery_id or from_date.strftime('%Y%m%d')}.{format}"
+        return StreamingResponse(
+            stream_from_thread(produce),
+            media_type=MEDIA_TYPES[format],
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        )
+
+    except ImportError as e:
+        results['error'] = {
+            'status_code': 'not-implemented',
+            "status_description": "Not Implemented",
+            "detail": str(e),
+        }
+
+        response.status_code = status.HTTP_501_NOT_IMPLEMENTED
+
+    except Exception as e:
+        results['error'] = {
+            'status_code': 'server-error',
+            "status_description": "Internal Server Error",
+            "detail": str(e),
+        }
+
+        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    return results
@@ -14,6 +14,7 @@ from fastapi import HTTPException
 from fastapi.routing import APIRoute
 
 from .queries import data
+from .queries import export
 
 
 class TimedRoute(APIRoute):
@@ -39,4 +40,5 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-router.include_router(data.router)
\ No newline at end of file
+router.include_router(data.router)
+router.include_router(export.router)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from fastapi import Response
+from fastapi.testclient import TestClient
+from database.models import PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity, WasteDust, WasteHotSpot, WasteFeedback, EventRegistry
+from data_api.main import app
+from data_api.routers.waste_feedback.queries.insert_feedback import insert_feedback, Request
+
+
+class RoutingTest(TransactionTestCase):
+    """
+    The endpoints with a fixed path are matched before /api/v1/{event} of the impurity router.
+    TransactionTestCase commits the rows, the sync endpoints read them from another thread.
+    """
+
+    def setUp(self):
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='edge_box', edge_box_location='gate')
+        WasteSegments.objects.create(
+            edge_box=edge_box, timestamp=datetime(2024, 1, 1, 8, tzinfo=timezone.utc), object_uid='object', event_uid='event',
+            object_tracker_id=1, object_polygon=[[.1, .2], [.3, .4]], confidence_score=.9, object_area=1., object_length=1.,
+            model_name='model', model_tag='tag',
+        )
+        self.client = TestClient(app)
+
+    def test_segments_is_not_an_event(self):
+        response = self.client.get('/api/v1/segments', params={'from_date': '2024-01-01'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['total_record'], 1)
+
+    def test_segments_export(self):
+        response = self.client.get('/api/v1/segments', params={'from_date': '2024-01-01', 'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/csv'))
+        self.assertEqual(response.text.splitlines()[1].split(',')[0], 'object')
+
+    def test_unknown_event(self):
+        self.assertEqual(self.client.get('/api/v1/unknown').status_code, 400)
+
+    def test_alarm_stats_group_by(self):
+        params = {'from_date': '2024-01-01T00:00:00'}
+        self.assertEqual(self.client.get('/api/v1/alarm/stats', params=dict(params, group_by='event,region')).status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/alarm/stats', params=dict(params, group_by='unknown')).status_code, 400)
+
+
+class InsertFeedbackTest(TestCase):
+    """
+    POST /feedback/{event_uid} resolves the event with one query of the event registry instead of
+    looking for it in each event table.
+    """
+
+    def post(self, event_uid):
+        response = Response()
+        with CaptureQueriesContext(connection) as queries:
+            results = insert_feedback(response, event_uid, Request(user_id='user', ack_status=True))
+        return response, results, [query['sql'] for query in queries]
+
+    def test_event_from_registry(self):
+        EventRegistry.register('event', 'dust', 2)
+
+        response, results, queries = self.post('event')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(results['event'], 'wastedust')
+        self.assertEqual(len([sql for sql in queries if 'event_registry' in sql]), 1)
+        tables = [model._meta.db_table for model in (WasteImpurity, WasteDust, WasteHotSpot)]
+        self.assertFalse([sql for sql in queries if any(table in sql for table in tables)])
+        self.assertEqual(WasteFeedback.objects.get(event_uid='event').rating, 2)
+
+    def test_unknown_event(self):
+        response, results, queries = self.post('unknown')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(results['error']['status_code'], 'non-matching-query')
+        self.assertEqual(len(queries), 1)
+        self.assertFalse(WasteFeedback.objects.exists())
@@ -3,7 +3,7 @@ from django.contrib import admin
 from .models import (
     PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity, WasteMaterial, WasteDust, WasteHotSpot, WasteFeedback,
     # Metadata, MetadataColumn, MetadataLocalization, Filter, FilterItem, FilterLocalization, FilterItemLocalization,
-    WasteAlarm,
+    WasteAlarm, AlarmRollup, DeliverySummary, EventRegistry, SyncOutbox,
 )
 
 # Existing Admin Configurations
@@ -81,6 +81,27 @@ class WasteAlarmAdmin(admin.ModelAdmin):
     ordering = ('-timestamp',)
     readonly_fields = ('created_at',)
 
+@admin.register(AlarmRollup)
+class AlarmRollupAdmin(admin.ModelAdmin):
+    list_display = ('bucket', 'event', 'edge_box', 'region', 'severity_level', 'count')
+    list_filter = ('event', 'severity_level', 'region')
+    ordering = ('-bucket',)
+
+@admin.register(DeliverySummary)
+class DeliverySummaryAdmin(admin.ModelAdmin):
+    list_display = ('delivery_id', 'edge_box', 'first_seen', 'last_seen', 'impurity_count', 'dust_count', 'hotspot_count', 'max_severity', 'longest_object')
+    search_fields = ('delivery_id',)
+    list_filter = ('edge_box', 'max_severity')
+    ordering = ('-last_seen',)
+    readonly_fields = ('updated_at',)
+
+@admin.register(EventRegistry)
+class EventRegistryAdmin(admin.ModelAdmin):
+    list_display = ('event_uid', 'event', 'severity_level', 'created_at')
+    search_fields = ('event_uid',)
+    list_filter = ('event', 'severity_level')
+    readonly_fields = ('created_at',)
+
 @admin.register(WasteFeedback)
 class WasteFeedbackAdmin(admin.ModelAdmin):
     list_display = ('id', 'event_uid', 'event', 'created_at', 'updated_at', 'user_id', 'ack_status', 'comment', 'rating')
@@ -97,3 +118,10 @@ class WasteFeedbackAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(SyncOutbox)
+class SyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'target', 'event_uid', 'created_at', 'next_attempt_at', 'delivered_at', 'attempts')
+    search_fields = ('event_uid', 'target')
+    list_filter = ('target', 'delivered_at')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at',)
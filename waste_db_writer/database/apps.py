@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class DatabaseConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'database'
+
+    def ready(self):
+        # connects the receivers invalidating the edge box cache
+        from database import signals
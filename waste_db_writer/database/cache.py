@@ -0,0 +1,26 @@
+import os
+from collections import Counter
+from utils.cache import VersionedCache
+from database.models import EdgeBoxInfo
+
+EDGE_BOX_CACHE_TTL = float(os.environ.get('EDGE_BOX_CACHE_TTL', 300))
+
+# edge boxes with their plant, keyed by edge_box_id
+edge_box_cache = VersionedCache(ttl=EDGE_BOX_CACHE_TTL)
+
+def cached_edge_box(edge_box_id):
+    """
+    Return the EdgeBoxInfo of edge_box_id with its plant loaded, so that the location and the tenant
+    domain of an event are read without a query. Raises EdgeBoxInfo.DoesNotExist if it is unknown.
+    """
+    return edge_box_cache.get(edge_box_id, lambda: EdgeBoxInfo.objects.select_related('plant').get(edge_box_id=edge_box_id))
+
+def warm_edge_boxes():
+    edge_boxes = list(EdgeBoxInfo.objects.select_related('plant'))
+    count = Counter(edge_box.edge_box_id for edge_box in edge_boxes)
+    for edge_box in edge_boxes:
+        # an ambiguous edge_box_id is left to cached_edge_box, which raises for it
+        if count[edge_box.edge_box_id] == 1:
+            edge_box_cache.set(edge_box.edge_box_id, edge_box)
+
+    return len(edge_boxes)
@@ -0,0 +1,81 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import OuterRef, Subquery
+from database.models import EdgeBoxInfo, WasteSegments, WasteImpurity, WasteAlarm
+from utils.convertor import polys2xyxy
+from utils.roi import assign_regions
+
+
+def chunks(queryset, chunk_size):
+    """
+    Yield the rows of queryset by chunks of chunk_size, walking the primary key.
+    """
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id).order_by('id')[:chunk_size])
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
+
+
+class Command(BaseCommand):
+    help = "assign the region of the WasteSegments, WasteImpurity and WasteAlarm rows written before it was stored, by chunks of rows"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--chunk-size", type=int, default=1000, help='number of rows read and updated per query')
+
+    def backfill_segments(self, chunk_size):
+        edge_boxes = {edge_box.pk: edge_box for edge_box in EdgeBoxInfo.objects.all()}
+        total = 0
+        rows = WasteSegments.objects.filter(region__isnull=True).only('id', 'edge_box_id', 'object_polygon')
+        for chunk in chunks(rows, chunk_size):
+            xyxy = polys2xyxy([row.object_polygon for row in chunk])
+            # the ROIs may differ per edge box
+            for edge_box_id in {row.edge_box_id for row in chunk}:
+                index = [i for i, row in enumerate(chunk) if row.edge_box_id == edge_box_id]
+                for i, region in zip(index, assign_regions(xyxy[index], edge_boxes.get(edge_box_id))):
+                    chunk[i].region = region
+
+            updated = [row for row in chunk if row.region is not None]
+            WasteSegments.objects.bulk_update(updated, ['region'])
+            total += len(updated)
+        return total
+
+    def backfill_impurities(self, chunk_size):
+        total = 0
+        rows = WasteImpurity.objects.filter(region__isnull=True).annotate(
+            segment_region=Subquery(WasteSegments.objects.filter(id=OuterRef('object_uid_id')).values('region')[:1])
+        ).only('id', 'meta_info')
+        for chunk in chunks(rows, chunk_size):
+            for row in chunk:
+                row.region = (row.meta_info or {}).get('region') or row.segment_region
+
+            updated = [row for row in chunk if row.region is not None]
+            WasteImpurity.objects.bulk_update(updated, ['region'])
+            total += len(updated)
+        return total
+
+    def backfill_alarms(self, chunk_size):
+        total = 0
+        # an impurity alarm has no link to its object, it gets the region of an impurity of its event
+        rows = WasteAlarm.objects.filter(region__isnull=True).annotate(
+            impurity_region=Subquery(
+                WasteImpurity.objects.filter(event_uid=OuterRef('event_uid'), region__isnull=False).values('region')[:1]
+            )
+        ).only('id', 'event', 'meta_info')
+        for chunk in chunks(rows, chunk_size):
+            for row in chunk:
+                row.region = (row.meta_info or {}).get('region') or (row.impurity_region if row.event == 'impurity' else None)
+
+            updated = [row for row in chunk if row.region is not None]
+            WasteAlarm.objects.bulk_update(updated, ['region'])
+            total += len(updated)
+        return total
+
+    def handle(self, *args, **kwargs):
+        # impurities read the region of their segment, alarms the region of the impurities
+        for name, backfill in (('segments', self.backfill_segments), ('impurities', self.backfill_impurities), ('alarms', self.backfill_alarms)):
+            total = backfill(kwargs['chunk_size'])
+            dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully assigned the region of {total} {name}."))
@@ -0,0 +1,38 @@
+import math
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandParser
+from database.models import WasteSegments
+from utils.convertor import polys2xyxy
+
+
+class Command(BaseCommand):
+    help = "compute the bounding box columns of the WasteSegments rows written before they were added, by chunks of rows"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--chunk-size", type=int, default=1000, help='number of rows read and updated per query')
+
+    def handle(self, *args, **kwargs):
+        last_id, total = 0, 0
+        while True:
+            rows = list(
+                WasteSegments.objects.filter(xmin__isnull=True, id__gt=last_id)
+                .order_by('id').only('id', 'object_polygon')[:kwargs['chunk_size']]
+            )
+            if not rows:
+                break
+
+            updated = []
+            for row, box in zip(rows, polys2xyxy([row.object_polygon for row in rows]).tolist()):
+                # an empty polygon has no bounding box, the row stays null
+                if math.isnan(box[0]):
+                    continue
+                row.xmin, row.ymin, row.xmax, row.ymax = box
+                updated.append(row)
+
+            WasteSegments.objects.bulk_update(updated, ['xmin', 'ymin', 'xmax', 'ymax'])
+            last_id = rows[-1].id
+            total += len(updated)
+            self.stdout.write(f"{total} rows updated, up to id {last_id}")
+
+        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully backfilled the bounding box of {total} segments."))
@@ -0,0 +1,68 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandParser
+from utils.common import rois
+from utils.roi import CompiledROIs
+
+
+def per_roi_point_polygon_test(xyxyn, rois):
+    """
+    Previous map_object_to_gate, one cv2.pointPolygonTest per ROI, kept as the reference for the benchmark.
+    """
+    import cv2
+
+    region = 'Bunker'
+    fake_size = 1000
+    xyxy = np.array([(int(xyxyn[i] * fake_size), int(xyxyn[i + 1] * fake_size)) for i in range(0, len(xyxyn), 2)]).flatten().tolist()
+    xmin, ymin, xmax, ymax = xyxy
+    center_x, center_y = (xmin + xmax) // 2, (ymax + ymin) // 2
+    for roi_name, roi_info in rois.items():
+        assert (np.array(roi_info['coords']) <= 1).all(), f'non-normalized or out of bounds coordinate of ROI: {roi_name}'
+        polygon = [(roi_info['coords'][i], roi_info['coords'][i+1]) for i in range(0, len(roi_info['coords']), 2)]
+        polygon = np.array([(int(x * fake_size), int(y * fake_size)) for x, y in polygon], np.int32).reshape((-1, 1, 2))
+        if cv2.pointPolygonTest(polygon, (center_x, center_y), True) > 0:
+            region = roi_name
+            break
+
+    return region
+
+
+class Command(BaseCommand):
+    help = "benchmark the region assignment of boxes with CompiledROIs against one cv2.pointPolygonTest per ROI and per box"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--sizes", type=int, nargs='+', default=[1, 100, 1000, 10000], help='number of boxes per call')
+        parser.add_argument("--repeat", type=int, default=3, help="number of runs per size, the best one is reported")
+        parser.add_argument("--seed", type=int, default=0, help="seed of the random boxes")
+
+    def best(self, fn, repeat):
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            durations.append(time.perf_counter() - start)
+        return result, min(durations) * 1000
+
+    def handle(self, *args, **kwargs):
+        try:
+            import cv2
+        except ImportError:
+            cv2 = None
+            self.stdout.write(self.style.WARNING("opencv is not installed, the reference is skipped"))
+
+        rng = np.random.default_rng(kwargs['seed'])
+        compiled = CompiledROIs(rois())
+        self.stdout.write(f"{'boxes':>8} {'cv2 ms':>10} {'compiled ms':>12} {'batch ms':>10} {'mismatches':>11}")
+        for size in kwargs['sizes']:
+            corners = rng.random((size, 2, 2))
+            xyxyn = np.concatenate([corners.min(axis=1), corners.max(axis=1)], axis=1).tolist()
+
+            batch, batch_ms = self.best(lambda: compiled.regions(xyxyn), kwargs['repeat'])
+            _, single_ms = self.best(lambda: [compiled.region(box) for box in xyxyn], kwargs['repeat'])
+            if cv2 is None:
+                self.stdout.write(f"{size:>8} {'-':>10} {single_ms:>12.2f} {batch_ms:>10.2f} {'-':>11}")
+                continue
+
+            reference, reference_ms = self.best(lambda: [per_roi_point_polygon_test(box, rois()) for box in xyxyn], kwargs['repeat'])
+            mismatches = sum(a != b for a, b in zip(reference, batch))
+            self.stdout.write(f"{size:>8} {reference_ms:>10.2f} {single_ms:>12.2f} {batch_ms:>10.2f} {mismatches:>11}")
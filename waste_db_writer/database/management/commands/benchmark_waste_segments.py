@@ -0,0 +1,78 @@
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from database.models import PlantInfo, EdgeBoxInfo, WasteSegments
+from events_api.tasks.waste_segments.core import save_waste_segments
+
+
+class Rollback(Exception):
+    pass
+
+
+def per_object_exists(objects, edge_box):
+    """
+    Previous deduplication, one exists() query per object, kept as the reference for the benchmark.
+    """
+    return [
+        objects['object_uid'][i] for i in range(len(objects['object_uid']))
+        if not WasteSegments.objects.filter(object_uid=objects['object_uid'][i], edge_box=edge_box).exists()
+    ]
+
+
+class Command(BaseCommand):
+    help = "benchmark query count and latency of save_waste_segments against the payload size, nothing is kept in the database"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--sizes", type=int, nargs='+', default=[1, 10, 100, 1000], help='number of objects per payload')
+        parser.add_argument("--repeat", type=int, default=3, help="number of runs per payload size")
+
+    def payload(self, size, known_uids):
+        # half of the objects were already stored by a previous frame
+        object_uids = known_uids[:size // 2] + [str(uuid.uuid4()) for _ in range(size - size // 2)]
+        return {
+            'object_uid': object_uids,
+            'object_tracker_id': list(range(size)),
+            'object_polygon': [[[0.1, 0.2], [0.3, 0.2], [0.3, 0.4], [0.1, 0.4]]] * size,
+            'confidence_score': [0.9] * size,
+            'object_area': [0.04] * size,
+            'object_length': [0.2] * size,
+            'img_id': 'benchmark',
+            'img_file': 'benchmark.jpg',
+            'model_name': 'benchmark',
+            'model_tag': 'benchmark',
+        }
+
+    def measure(self, fn, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn(*args)
+            duration = time.perf_counter() - start
+        return len(ctx.captured_queries), duration * 1000
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(f"{'objects':>8} {'exists() queries':>17} {'exists() ms':>12} {'save queries':>13} {'save ms':>9}")
+        try:
+            with transaction.atomic():
+                plant = PlantInfo.objects.create(plant_id='benchmark', plant_name='benchmark', plant_location='benchmark')
+                edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='benchmark', edge_box_location='benchmark')
+                for size in kwargs['sizes']:
+                    known_uids = [str(uuid.uuid4()) for _ in range(size // 2)]
+                    save_waste_segments(self.payload(size, known_uids), edge_box=edge_box)
+
+                    legacy, current = [], []
+                    for _ in range(kwargs['repeat']):
+                        objects = self.payload(size, known_uids)
+                        legacy.append(self.measure(per_object_exists, objects, edge_box))
+                        current.append(self.measure(save_waste_segments, objects, edge_box))
+
+                    self.stdout.write(
+                        f"{size:>8} {legacy[0][0]:>17} {min(ms for _, ms in legacy):>12.2f} "
+                        f"{current[0][0]:>13} {min(ms for _, ms in current):>9.2f}"
+                    )
+                raise Rollback()
+        except Rollback:
+            pass
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete, all rows rolled back."))
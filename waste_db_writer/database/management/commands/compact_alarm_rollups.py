@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandParser, CommandError
+from utils.alarm_rollup import compact_rollups
+from utils.response_cache import bump_generation
+
+
+class Command(BaseCommand):
+    help = "rebuild the hourly alarm rollups from the alarms, one day per transaction, up to the last closed hour"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--days", type=int, default=2, help='number of days up to now to rebuild, ignored with --from-date')
+        parser.add_argument("--from-date", type=str, default=None, help='first day to rebuild, YYYY-MM-DD, e.g. the first alarm to fill the rollups')
+        parser.add_argument("--to-date", type=str, default=None, help='last day to rebuild, YYYY-MM-DD, defaults to today')
+
+    def handle(self, *args, **kwargs):
+        now = datetime.now(tz=timezone.utc)
+        today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+        try:
+            to_date = datetime.strptime(kwargs['to_date'], "%Y-%m-%d").replace(tzinfo=timezone.utc) if kwargs['to_date'] else today
+            from_date = datetime.strptime(kwargs['from_date'], "%Y-%m-%d").replace(tzinfo=timezone.utc) if kwargs['from_date'] else today - timedelta(days=kwargs['days'] - 1)
+        except ValueError as err:
+            raise CommandError(err)
+
+        day, total = from_date, 0
+        while day <= to_date:
+            total += compact_rollups(day, day + timedelta(days=1))
+            day += timedelta(days=1)
+
+        # the cached GET /alarm/stats responses are read again from the rebuilt rollups
+        bump_generation()
+
+        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully rebuilt {total} alarm rollups from {from_date.date()} to {to_date.date()}."))
@@ -0,0 +1,33 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandParser
+from utils.sync import dispatcher
+
+
+class Command(BaseCommand):
+    help = "deliver the pending rows of the sync outbox to edge cloud sync"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--url", type=str, default=dispatcher.SYNC_URL, help='edge cloud sync data endpoint')
+        parser.add_argument("--batch-size", type=int, default=dispatcher.BATCH_SIZE, help='number of rows delivered per batch')
+        parser.add_argument("--poll-interval", type=float, default=dispatcher.POLL_INTERVAL, help='seconds to wait when the outbox is drained')
+        parser.add_argument("--retention-days", type=int, default=7, help='how long delivered rows are kept in days')
+        parser.add_argument("--batched", action='store_true', default=dispatcher.BATCH_DELIVERY, help='send the payloads of each target as one array')
+        parser.add_argument("--batch-window", type=float, default=dispatcher.BATCH_WINDOW, help='seconds over which pending payloads are gathered in batched mode')
+        parser.add_argument("--once", action='store_true', help='deliver one batch and exit')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['once']:
+            delivered = dispatcher.dispatch_pending(url=kwargs['url'], batch_size=kwargs['batch_size'], batched=kwargs['batched'])
+            dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully delivered {delivered} outbox rows."))
+            return
+
+        self.stdout.write(f"Dispatching sync outbox to {kwargs['url']}")
+        dispatcher.run(
+            url=kwargs['url'],
+            batch_size=kwargs['batch_size'],
+            poll_interval=kwargs['poll_interval'],
+            retention_days=kwargs['retention_days'],
+            batched=kwargs['batched'],
+            batch_window=kwargs['batch_window'],
+        )
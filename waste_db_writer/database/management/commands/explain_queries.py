@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connection, transaction
+from database.models import WasteAlarm, WasteImpurity, WasteSegments, WasteFeedback
+
+
+def hot_queries():
+    """
+    The queries of the read and write paths the indexes of database.models are meant for.
+    """
+    now = datetime.now(tz=timezone.utc)
+    day = (now - timedelta(days=1), now)
+    return {
+        'alarm page': WasteAlarm.objects.filter(created_at__range=day).order_by('-created_at', '-id')[:15],
+        'alarm by event_uid': WasteAlarm.objects.filter(event_uid='explain'),
+        'impurity by delivery': WasteImpurity.objects.filter(delivery_id='explain').order_by('-created_at'),
+        'segments by timestamp': WasteSegments.objects.filter(timestamp__range=day).order_by('timestamp'),
+        'segments by delivery': WasteSegments.objects.filter(delivery_id='explain').order_by('timestamp'),
+        'segments dedupe': WasteSegments.objects.filter(edge_box_id=1, object_uid__in=['explain']),
+        'feedback by user': WasteFeedback.objects.filter(event_uid='explain', user_id='explain'),
+        'latest feedback': WasteFeedback.objects.filter(event_uid='explain').order_by('-created_at')[:1],
+    }
+
+
+def full_scan(plan):
+    if connection.vendor == 'postgresql':
+        return 'Seq Scan' in plan
+    if connection.vendor == 'sqlite':
+        return any('SCAN ' in line and 'USING' not in line for line in plan.splitlines())
+    return 'ALL' in plan
+
+
+class Command(BaseCommand):
+    help = "print the query plan of the hot queries and check that they use an index"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--check", action='store_true', help='fail if a query plans a full table scan')
+
+    def handle(self, *args, **kwargs):
+        full_scans = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # on small tables the planner prefers a seq scan, this checks that an index is usable
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in hot_queries().items():
+                plan = queryset.explain()
+                self.stdout.write(f"{name}:\n{plan}\n")
+                if full_scan(plan):
+                    full_scans.append(name)
+
+        if full_scans and kwargs['check']:
+            raise CommandError(f"full table scan in: {', '.join(full_scans)}")
+
+        for name in full_scans:
+            self.stdout.write(self.style.WARNING(f"{name} plans a full table scan"))
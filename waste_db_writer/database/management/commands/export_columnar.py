@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandParser, CommandError
+from utils import columnar
+
+
+class Command(BaseCommand):
+    help = "export WasteSegments and WasteImpurity as parquet or arrow files partitioned by day and edge box"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output", type=str, required=True, help='directory of the partitioned dataset')
+        parser.add_argument("--from-date", type=str, default=None, help='first day to export, YYYY-MM-DD, defaults to yesterday')
+        parser.add_argument("--to-date", type=str, default=None, help='last day to export, YYYY-MM-DD, defaults to from-date')
+        parser.add_argument("--tables", type=str, nargs='+', default=list(columnar.TABLES), choices=list(columnar.TABLES), help='tables to export')
+        parser.add_argument("--format", type=str, default='parquet', choices=list(columnar.FORMATS), help='file format')
+
+    def handle(self, *args, **kwargs):
+        try:
+            columnar.require_pyarrow()
+            from_date = datetime.strptime(kwargs['from_date'], "%Y-%m-%d").date() if kwargs['from_date'] else datetime.utcnow().date() - timedelta(days=1)
+            to_date = datetime.strptime(kwargs['to_date'], "%Y-%m-%d").date() if kwargs['to_date'] else from_date
+        except (ImportError, ValueError) as err:
+            raise CommandError(err)
+
+        for table in kwargs['tables']:
+            files, total = 0, 0
+            for path, count in columnar.export_partitions(table, from_date, to_date, kwargs['output'], kwargs['format']):
+                self.stdout.write(f"{path}: {count} rows")
+                files += 1
+                total += count
+
+            dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully exported {total} {table} rows to {files} files."))
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandParser
+from utils.delivery_summary import EVENT_MODELS, has_delivery, rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "rebuild the delivery summaries from the impurity, dust and hotspot events, one chunk of deliveries per transaction"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--delivery-id", type=str, nargs='+', default=None, help='deliveries to rebuild, instead of those with events in the last --days')
+        parser.add_argument("--days", type=int, default=2, help='rebuild the deliveries with events written in this number of days up to now, 0 for every delivery')
+        parser.add_argument("--chunk-size", type=int, default=200, help="number of deliveries per transaction")
+
+    def handle(self, *args, **kwargs):
+        delivery_ids = kwargs['delivery_id']
+        if delivery_ids is None:
+            delivery_ids = set()
+            since = datetime.now(tz=timezone.utc) - timedelta(days=kwargs['days'])
+            for model in EVENT_MODELS.values():
+                events = model.objects.exclude(delivery_id__isnull=True)
+                if kwargs['days'] > 0:
+                    events = events.filter(created_at__gte=since)
+                delivery_ids.update(events.values_list('delivery_id', flat=True).distinct().order_by())
+        delivery_ids = sorted(d for d in delivery_ids if has_delivery(d))
+
+        total = 0
+        for i in range(0, len(delivery_ids), kwargs['chunk_size']):
+            total += rebuild_summaries(delivery_ids[i:i + kwargs['chunk_size']])
+
+        dt = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.stdout.write(self.style.SUCCESS(f"{dt}: Successfully rebuilt {total} delivery summaries."))
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0011_syncoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wastealarm',
+            index=models.Index(fields=['created_at', 'id'], name='waste_alarm_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastedust',
+            index=models.Index(fields=['created_at', 'id'], name='waste_dust_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastehotspot',
+            index=models.Index(fields=['created_at', 'id'], name='waste_hotspot_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteimpurity',
+            index=models.Index(fields=['created_at', 'id'], name='waste_impurity_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastesegments',
+            index=models.Index(fields=['created_at', 'id'], name='waste_segments_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 4.2 on 2026-10-17 18:09
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def dedupe_waste_segments(apps, schema_editor):
+    """
+    Keep one segment per (edge_box, object_uid) before the unique constraint is added: the oldest
+    one that has an impurity or a material, or the oldest one. The impurity and material of a
+    removed row are moved to the kept one, nothing is deleted with it.
+
+    Both reference their segment through a OneToOneField, so a duplicate with two impurities (or two
+    materials) on different rows cannot be merged. The migration then stops before changing anything
+    and lists those rows, to be resolved by hand.
+    """
+    WasteSegments = apps.get_model('database', 'WasteSegments')
+    dependents = [apps.get_model('database', 'WasteImpurity'), apps.get_model('database', 'WasteMaterial')]
+    duplicates = (
+        WasteSegments.objects.values('edge_box_id', 'object_uid')
+        .annotate(count=Count('id')).filter(count__gt=1).order_by()
+    )
+
+    plans, conflicts = [], []
+    for duplicate in duplicates.iterator():
+        ids = list(
+            WasteSegments.objects.filter(edge_box_id=duplicate['edge_box_id'], object_uid=duplicate['object_uid'])
+            .order_by('id').values_list('id', flat=True)
+        )
+        refs = {
+            model: dict(model.objects.filter(object_uid_id__in=ids).values_list('id', 'object_uid_id'))
+            for model in dependents
+        }
+        referenced = {segment_id for rows in refs.values() for segment_id in rows.values()}
+        keep = min(referenced) if referenced else ids[0]
+
+        for model, rows in refs.items():
+            if len(rows) > 1:
+                conflicts.append(
+                    f"edge_box_id={duplicate['edge_box_id']} object_uid={duplicate['object_uid']}: "
+                    f"segments {ids}, {model._meta.db_table} ids {sorted(rows)}"
+                )
+        plans.append((ids, keep, refs))
+
+    if conflicts:
+        raise RuntimeError(
+            f"Cannot add waste_segments_object_uniq, {len(conflicts)} duplicate segments have several "
+            f"impurities or materials, merge or delete them first:\n" + "\n".join(conflicts[:50])
+        )
+
+    for ids, keep, refs in plans:
+        for model, rows in refs.items():
+            model.objects.filter(id__in=[pk for pk, segment_id in rows.items() if segment_id != keep]).update(object_uid_id=keep)
+        WasteSegments.objects.filter(id__in=ids).exclude(id=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0012_created_at_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wastealarm',
+            index=models.Index(fields=['event_uid'], name='waste_alarm_event_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastealarm',
+            index=models.Index(fields=['delivery_id', 'created_at'], name='waste_alarm_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastedust',
+            index=models.Index(fields=['event_uid'], name='waste_dust_event_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastedust',
+            index=models.Index(fields=['delivery_id', 'created_at'], name='waste_dust_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastefeedback',
+            index=models.Index(fields=['event_uid', 'user_id'], name='waste_feedback_event_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastefeedback',
+            index=models.Index(fields=['event_uid', 'created_at'], name='waste_feedback_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastehotspot',
+            index=models.Index(fields=['event_uid'], name='waste_hotspot_event_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastehotspot',
+            index=models.Index(fields=['delivery_id', 'created_at'], name='waste_hotspot_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteimpurity',
+            index=models.Index(fields=['event_uid'], name='waste_impurity_event_uid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteimpurity',
+            index=models.Index(fields=['delivery_id', 'created_at'], name='waste_impurity_delivery_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastesegments',
+            index=models.Index(fields=['timestamp'], name='waste_segments_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastesegments',
+            index=models.Index(fields=['delivery_id', 'timestamp'], name='waste_segments_delivery_idx'),
+        ),
+        migrations.RunPython(dedupe_waste_segments, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wastesegments',
+            constraint=models.UniqueConstraint(fields=('edge_box', 'object_uid'), name='waste_segments_object_uniq'),
+        ),
+    ]
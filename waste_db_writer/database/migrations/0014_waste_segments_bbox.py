@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0013_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastesegments',
+            name='xmax',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wastesegments',
+            name='xmin',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wastesegments',
+            name='ymax',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='wastesegments',
+            name='ymin',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
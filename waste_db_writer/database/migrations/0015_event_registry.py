@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-17 18:23
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def register_events(apps, schema_editor):
+    """
+    Register the event_uid of the stored impurity, dust and hotspot events, with their highest
+    severity_level.
+    """
+    EventRegistry = apps.get_model('database', 'EventRegistry')
+    for model_name, event in (('WasteImpurity', 'impurity'), ('WasteDust', 'dust'), ('WasteHotSpot', 'hotspot')):
+        events = (
+            apps.get_model('database', model_name).objects.values('event_uid')
+            .annotate(severity_level=Max('severity_level')).order_by()
+        )
+        batch = []
+        for row in events.iterator(chunk_size=1000):
+            batch.append(EventRegistry(event_uid=row['event_uid'], event=event, severity_level=row['severity_level']))
+            if len(batch) >= 1000:
+                EventRegistry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        EventRegistry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0014_waste_segments_bbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRegistry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_uid', models.CharField(max_length=255, unique=True)),
+                ('event', models.CharField(max_length=100)),
+                ('severity_level', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Event Registry',
+                'db_table': 'event_registry',
+            },
+        ),
+        migrations.RunPython(register_events, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-17 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0015_event_registry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wastealarm',
+            name='region',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='wasteimpurity',
+            name='region',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='wastesegments',
+            name='region',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='wastealarm',
+            index=models.Index(fields=['region', 'created_at'], name='waste_alarm_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wasteimpurity',
+            index=models.Index(fields=['region', 'created_at'], name='waste_impurity_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wastesegments',
+            index=models.Index(fields=['region', 'timestamp'], name='waste_segments_region_idx'),
+        ),
+    ]
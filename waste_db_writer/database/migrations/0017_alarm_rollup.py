@@ -0,0 +1,34 @@
+# Generated by Django 4.2 on 2026-10-17 18:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0016_region'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlarmRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('event', models.CharField(max_length=100)),
+                ('region', models.CharField(blank=True, default='', max_length=100)),
+                ('severity_level', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('edge_box', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='database.edgeboxinfo')),
+            ],
+            options={
+                'verbose_name_plural': 'Alarm Rollup',
+                'db_table': 'alarm_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='alarmrollup',
+            constraint=models.UniqueConstraint(fields=('bucket', 'event', 'edge_box', 'region', 'severity_level'), name='alarm_rollup_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-17 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0017_alarm_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliverySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delivery_id', models.CharField(max_length=255, unique=True)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('impurity_count', models.IntegerField(default=0)),
+                ('dust_count', models.IntegerField(default=0)),
+                ('hotspot_count', models.IntegerField(default=0)),
+                ('max_severity', models.IntegerField(blank=True, null=True)),
+                ('event_uid', models.CharField(blank=True, max_length=255, null=True)),
+                ('img_id', models.CharField(blank=True, max_length=255, null=True)),
+                ('img_file', models.CharField(blank=True, max_length=255, null=True)),
+                ('longest_object', models.FloatField(blank=True, null=True)),
+                ('longest_object_uid', models.CharField(blank=True, max_length=255, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('edge_box', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='database.edgeboxinfo')),
+            ],
+            options={
+                'verbose_name_plural': 'Delivery Summary',
+                'db_table': 'delivery_summary',
+            },
+        ),
+    ]
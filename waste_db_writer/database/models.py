@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 class PlantInfo(models.Model):
@@ -45,6 +46,13 @@ class WasteSegments(models.Model):
     confidence_score = models.FloatField(max_length=100)
     object_area = models.FloatField(max_length=100)
     object_length = models.FloatField(max_length=100)
+    # bounding box of object_polygon, computed at write time
+    xmin = models.FloatField(null=True, blank=True)
+    ymin = models.FloatField(null=True, blank=True)
+    xmax = models.FloatField(null=True, blank=True)
+    ymax = models.FloatField(null=True, blank=True)
+    # ROI of the bounding box center, assigned at write time
+    region = models.CharField(max_length=100, null=True, blank=True)
     img_id = models.CharField(max_length=255, null=True, blank=True)
     img_file = models.CharField(max_length=255, null=True, blank=True)
     model_name = models.CharField(max_length=255)
@@ -55,6 +63,15 @@ class WasteSegments(models.Model):
     class Meta: 
         db_table = 'waste_segments'
         verbose_name_plural = 'Waste Segments'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='waste_segments_created_id_idx'),
+            models.Index(fields=['timestamp'], name='waste_segments_timestamp_idx'),
+            models.Index(fields=['delivery_id', 'timestamp'], name='waste_segments_delivery_idx'),
+            models.Index(fields=['region', 'timestamp'], name='waste_segments_region_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['edge_box', 'object_uid'], name='waste_segments_object_uniq'),
+        ]
         
     def __str__(self):
         return f"{self.object_uid}"
@@ -73,6 +90,8 @@ class WasteImpurity(models.Model):
     confidence_score = models.FloatField()
     severity_level = models.IntegerField()
     object_coordinates = models.JSONField(null=True, blank=True)
+    # meta_info['region'] of the event, or the region of the segment
+    region = models.CharField(max_length=100, null=True, blank=True)
     img_id = models.CharField(max_length=255)
     img_file = models.CharField(max_length=255)
     model_name = models.CharField(max_length=255)
@@ -82,20 +101,30 @@ class WasteImpurity(models.Model):
     class Meta:
         db_table = 'waste_impurity'
         verbose_name_plural = 'Waste Impurity'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='waste_impurity_created_id_idx'),
+            models.Index(fields=['event_uid'], name='waste_impurity_event_uid_idx'),
+            models.Index(fields=['delivery_id', 'created_at'], name='waste_impurity_delivery_idx'),
+            models.Index(fields=['region', 'created_at'], name='waste_impurity_region_idx'),
+        ]
         
     def __str__(self):
         return f"{self.object_uid.object_uid}: {self.object_uid.object_length}"
     
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
-        
-        WasteAlarm.objects.create(
+        self.to_alarm().save()
+        EventRegistry.register(self.event_uid, 'impurity', self.severity_level)
+    
+    def to_alarm(self):
+        return WasteAlarm(
             event='impurity',
             edge_box=self.edge_box,
             timestamp=self.timestamp,
             event_uid=self.event_uid,
             delivery_id=self.delivery_id,
             location=self.location,
+            region=self.region,
             confidence_score=self.confidence_score,
             severity_level=self.severity_level,
             img_id=self.img_id,
@@ -148,12 +177,18 @@ class WasteDust(models.Model):
     class Meta:
         db_table = 'waste_dust'
         verbose_name_plural = 'Waste Dust'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='waste_dust_created_id_idx'),
+            models.Index(fields=['event_uid'], name='waste_dust_event_uid_idx'),
+            models.Index(fields=['delivery_id', 'created_at'], name='waste_dust_delivery_idx'),
+        ]
         
     def __str__(self):
         return f"dust {self.event_uid} at {self.edge_box}"
     
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        EventRegistry.register(self.event_uid, 'dust', self.severity_level)
         
         WasteAlarm.objects.create(
             event='dust',
@@ -162,6 +197,7 @@ class WasteDust(models.Model):
             event_uid=self.event_uid,
             delivery_id=self.delivery_id,
             location=self.location,
+            region=(self.meta_info or {}).get('region'),
             confidence_score=self.confidence_score,
             severity_level=self.severity_level,
             img_id=self.img_id,
@@ -190,12 +226,18 @@ class WasteHotSpot(models.Model):
     class Meta:
         db_table = 'waste_hostspot'
         verbose_name_plural = 'Waste HotSpot'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='waste_hotspot_created_id_idx'),
+            models.Index(fields=['event_uid'], name='waste_hotspot_event_uid_idx'),
+            models.Index(fields=['delivery_id', 'created_at'], name='waste_hotspot_delivery_idx'),
+        ]
         
     def __str__(self):
         return f"hotspot {self.event_uid} at {self.edge_box}"
     
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        EventRegistry.register(self.event_uid, 'hotspot', self.severity_level)
         
         WasteAlarm.objects.create(
             event='hotspot',
@@ -204,6 +246,7 @@ class WasteHotSpot(models.Model):
             event_uid=self.event_uid,
             delivery_id=self.delivery_id,
             location=self.location,
+            region=(self.meta_info or {}).get('region'),
             confidence_score=self.confidence_score,
             severity_level=self.severity_level,
             img_id=self.img_id,
@@ -221,6 +264,7 @@ class WasteAlarm(models.Model):
     event_uid = models.CharField(max_length=255)
     delivery_id = models.CharField(max_length=255, null=True, blank=True)
     location = models.CharField(max_length=255, null=True, blank=True)
+    region = models.CharField(max_length=100, null=True, blank=True)
     confidence_score = models.FloatField()
     severity_level = models.IntegerField()
     img_id = models.CharField(max_length=255)
@@ -232,10 +276,87 @@ class WasteAlarm(models.Model):
     class Meta:
         db_table = 'waste_alar,'
         verbose_name_plural = 'Waste Alarm'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='waste_alarm_created_id_idx'),
+            models.Index(fields=['event_uid'], name='waste_alarm_event_uid_idx'),
+            models.Index(fields=['delivery_id', 'created_at'], name='waste_alarm_delivery_idx'),
+            models.Index(fields=['region', 'created_at'], name='waste_alarm_region_idx'),
+        ]
         
     def __str__(self):
         return f"{self.event} {self.event_uid} at {self.edge_box}"
     
+class AlarmRollup(models.Model):
+    """
+    Number of alarms per hour, event, edge box, region and severity level, see utils.alarm_rollup.
+    """
+    bucket = models.DateTimeField()
+    event = models.CharField(max_length=100)
+    edge_box = models.ForeignKey(EdgeBoxInfo, on_delete=models.CASCADE)
+    region = models.CharField(max_length=100, blank=True, default='')
+    severity_level = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'alarm_rollup'
+        verbose_name_plural = 'Alarm Rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'event', 'edge_box', 'region', 'severity_level'], name='alarm_rollup_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.count} {self.event} at {self.bucket}"
+
+class DeliverySummary(models.Model):
+    """
+    Summary of the impurity, dust and hotspot events of a delivery, kept up to date by the writers,
+    see utils.delivery_summary. The counts are numbers of events (distinct event_uid), not of
+    objects. event_uid, img_id and img_file are those of the first event of the highest severity,
+    the representative image of the delivery.
+    """
+    delivery_id = models.CharField(max_length=255, unique=True)
+    edge_box = models.ForeignKey(EdgeBoxInfo, on_delete=models.CASCADE, null=True, blank=True)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    impurity_count = models.IntegerField(default=0)
+    dust_count = models.IntegerField(default=0)
+    hotspot_count = models.IntegerField(default=0)
+    max_severity = models.IntegerField(null=True, blank=True)
+    event_uid = models.CharField(max_length=255, null=True, blank=True)
+    img_id = models.CharField(max_length=255, null=True, blank=True)
+    img_file = models.CharField(max_length=255, null=True, blank=True)
+    longest_object = models.FloatField(null=True, blank=True)
+    longest_object_uid = models.CharField(max_length=255, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'delivery_summary'
+        verbose_name_plural = 'Delivery Summary'
+
+    def __str__(self):
+        return f"{self.delivery_id}: {self.first_seen} - {self.last_seen}"
+
+class EventRegistry(models.Model):
+    event_uid = models.CharField(max_length=255, unique=True)
+    event = models.CharField(max_length=100)
+    severity_level = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'event_registry'
+        verbose_name_plural = 'Event Registry'
+
+    def __str__(self):
+        return f"{self.event} {self.event_uid}"
+
+    @classmethod
+    def register(cls, event_uid, event, severity_level):
+        """
+        Record the event type of event_uid, keeping the highest severity_level of its objects.
+        """
+        cls.objects.bulk_create([cls(event_uid=event_uid, event=event, severity_level=severity_level)], ignore_conflicts=True)
+        cls.objects.filter(event_uid=event_uid, severity_level__lt=severity_level).update(severity_level=severity_level)
+
 class WasteFeedback(models.Model):
     event_uid = models.CharField(max_length=255)
     event = models.CharField(max_length=255)
@@ -251,8 +372,32 @@ class WasteFeedback(models.Model):
         db_table = 'waste_feedback'
         verbose_name = 'Waste Feedback'
         verbose_name_plural = 'Waste Feedbacks'
+        indexes = [
+            models.Index(fields=['event_uid', 'user_id'], name='waste_feedback_event_user_idx'),
+            models.Index(fields=['event_uid', 'created_at'], name='waste_feedback_latest_idx'),
+        ]
 
     def __str__(self):
         return f"{self.event} created at {self.created_at}"
     
 
+
+class SyncOutbox(models.Model):
+    event_uid = models.CharField(max_length=255)
+    target = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'sync_outbox'
+        verbose_name_plural = 'Sync Outbox'
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'], condition=models.Q(delivered_at__isnull=True), name='sync_outbox_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.target} {self.event_uid}"
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from database.models import PlantInfo, EdgeBoxInfo, WasteAlarm, WasteImpurity, WasteDust, WasteHotSpot
+from database.cache import edge_box_cache
+from utils.alarm_stream import publish_alarms
+from utils.alarm_rollup import increment_rollups
+from utils.delivery_summary import summarize_events
+
+
+@receiver([post_save, post_delete])
+def invalidate_edge_box_cache(sender, **kwargs):
+    if sender in (PlantInfo, EdgeBoxInfo):
+        edge_box_cache.invalidate()
+
+
+@receiver(post_save, sender=WasteAlarm)
+def publish_new_alarm(sender, instance, created, **kwargs):
+    # alarms written with bulk_create are published by their writer
+    if created:
+        transaction.on_commit(lambda: publish_alarms([instance.id]))
+
+
+@receiver(post_save, sender=WasteAlarm)
+def count_new_alarm(sender, instance, created, **kwargs):
+    # alarms written with bulk_create are counted by their writer
+    if created:
+        increment_rollups([instance])
+
+
+@receiver(post_save, sender=WasteImpurity)
+@receiver(post_save, sender=WasteDust)
+@receiver(post_save, sender=WasteHotSpot)
+def summarize_new_event(sender, instance, created, **kwargs):
+    # events written with bulk_create are summarized by their writer
+    if created:
+        summarize_events([instance])
@@ -0,0 +1,229 @@
+from io import StringIO
+from importlib.util import find_spec
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+from datetime import datetime, timedelta, timezone
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from database.models import PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity, WasteDust, WasteHotSpot, WasteFeedback, WasteAlarm, AlarmRollup, DeliverySummary
+from utils.common import get_impurity_info, get_dust_info, get_hotspot_info
+from database.management.commands.explain_queries import hot_queries, full_scan
+from events_api.tasks.waste_segments.core import build_waste_segments
+from events_api.tasks.waste_impurity.core import update_waste_impurity
+from utils.roi import DEFAULT_REGION, assign_regions
+from utils.alarm_rollup import increment_rollups, compact_rollups
+from utils.delivery_summary import rebuild_summaries
+from utils.columnar import partition_path
+
+
+class LatestFeedbackQueriesTest(TestCase):
+    """
+    The feedback of the events is read with the events (utils.common.with_latest_feedback), the
+    number of queries does not grow with the number of events.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        cls.edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='edge_box', edge_box_location='gate')
+        cls.timestamp = datetime(2024, 1, 1, 8, tzinfo=timezone.utc)
+
+    def create_events(self, count, delivery_id):
+        common = dict(
+            edge_box=self.edge_box, timestamp=self.timestamp, delivery_id=delivery_id, confidence_score=.9,
+            severity_level=1, img_id='img', img_file='img.jpg', model_name='model', model_tag='tag',
+        )
+        segments = WasteSegments.objects.bulk_create([
+            WasteSegments(
+                edge_box=self.edge_box, timestamp=self.timestamp, object_uid=f'{delivery_id}-{i}', event_uid=f'{delivery_id}-{i}',
+                object_tracker_id=i, object_polygon=[[0, 0], [1, 1]], confidence_score=.9, object_area=1., object_length=1.,
+                model_name='model', model_tag='tag',
+            ) for i in range(count)
+        ])
+        WasteImpurity.objects.bulk_create([
+            WasteImpurity(object_uid=segment, event_uid=f'{delivery_id}-impurity-{i}', object_tracker_id=i, is_problematic=True, **common)
+            for i, segment in enumerate(segments)
+        ])
+        WasteDust.objects.bulk_create([WasteDust(event_uid=f'{delivery_id}-dust-{i}', **common) for i in range(count)])
+        WasteHotSpot.objects.bulk_create([WasteHotSpot(event_uid=f'{delivery_id}-hotspot-{i}', **common) for i in range(count)])
+        WasteFeedback.objects.bulk_create([
+            WasteFeedback(event_uid=f'{delivery_id}-{event}-{i}', event=event, updated_at=self.timestamp, ack_status=True, rating=3)
+            for event in ('impurity', 'dust', 'hotspot') for i in range(count)
+        ])
+
+    def count_queries(self, get_info, delivery_id):
+        with CaptureQueriesContext(connection) as queries:
+            rows = get_info(Q(delivery_id=delivery_id))
+        return len(queries), rows
+
+    def test_queries_do_not_grow_with_page_size(self):
+        self.create_events(1, 'one')
+        self.create_events(20, 'many')
+
+        for get_info in (get_impurity_info, get_dust_info, get_hotspot_info):
+            with self.subTest(get_info=get_info.__name__):
+                one, rows_one = self.count_queries(get_info, 'one')
+                many, rows_many = self.count_queries(get_info, 'many')
+
+                self.assertEqual((len(rows_one), len(rows_many)), (1, 20))
+                self.assertTrue(all(row['ack_status'] for row in rows_many))
+                self.assertEqual(one, many)
+                self.assertEqual(many, 1)
+
+
+class QueryPlanTest(TestCase):
+    """
+    The hot queries of database.management.commands.explain_queries plan an index scan.
+    """
+
+    def test_hot_queries_use_an_index(self):
+        if connection.vendor == 'postgresql':
+            # on the empty test tables the planner prefers a seq scan, this checks that an index is usable
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for name, queryset in hot_queries().items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertFalse(full_scan(plan), f"{name} plans a full table scan:\n{plan}")
+
+
+class SegmentBoxesTest(TestCase):
+    """
+    build_waste_segments stores the bounding box of the polygon of each object and its region, from
+    the ROIs of the edge box.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        cls.edge_box = EdgeBoxInfo.objects.create(
+            plant=plant, edge_box_id='edge_box', edge_box_location='gate',
+            meta_info={'rois': {'Gate': {'coords': [0, 0, .5, 0, .5, .5, 0, .5], 'color': [0, 255, 0]}}},
+        )
+
+    def build(self, polygons):
+        objects = dict(
+            object_uid=[f'object-{i}' for i in range(len(polygons))], object_tracker_id=list(range(len(polygons))),
+            object_polygon=polygons, confidence_score=[.9] * len(polygons), object_area=[1.] * len(polygons),
+            object_length=[1.] * len(polygons), timestamp='2024-01-01 08:00:00', model_name='model', model_tag='tag',
+        )
+        return build_waste_segments(objects, self.edge_box)
+
+    def test_bounding_box(self):
+        segments = self.build([[[.1, .2], [.3, .1], [.2, .4]], []])
+
+        self.assertEqual([(s.xmin, s.ymin, s.xmax, s.ymax) for s in segments], [(.1, .1, .3, .4), (None,) * 4])
+
+    def test_region(self):
+        segments = self.build([[[.1, .1], [.2, .2]], [[.6, .6], [.9, .9]], []])
+        boxes = [[s.xmin, s.ymin, s.xmax, s.ymax] for s in segments[:2]]
+
+        self.assertEqual([s.region for s in segments], ['Gate', DEFAULT_REGION, None])
+        self.assertEqual([s.region for s in segments[:2]], assign_regions(boxes, self.edge_box))
+
+
+class AlarmRollupTest(TestCase):
+    """
+    The rollups incremented by the writers equal the rollups rebuilt by compact_rollups.
+    """
+
+    def test_increment_equals_compact(self):
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='edge_box', edge_box_location='gate')
+        hour = datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+
+        # bulk_create sends no post_save, the rollups are only incremented below
+        WasteAlarm.objects.bulk_create([
+            WasteAlarm(
+                event=('impurity', 'dust')[i % 2], edge_box=edge_box, timestamp=hour, event_uid=f'event-{i}',
+                region=(None, '', 'Gate')[i % 3], confidence_score=.9, severity_level=i % 4, img_id='img',
+                img_file='img.jpg', model_name='model', model_tag='tag',
+            ) for i in range(24)
+        ])
+        # created_at is set on insert, the alarms are moved to closed hours
+        for i, alarm in enumerate(WasteAlarm.objects.order_by('id')):
+            WasteAlarm.objects.filter(id=alarm.id).update(created_at=hour + timedelta(hours=i % 2, minutes=i))
+        increment_rollups(WasteAlarm.objects.all())
+
+        fields = ('bucket', 'event', 'edge_box_id', 'region', 'severity_level', 'count')
+        incremented = set(AlarmRollup.objects.values_list(*fields))
+        self.assertEqual(sum(row[-1] for row in incremented), 24)
+
+        self.assertEqual(compact_rollups(hour, hour + timedelta(hours=2)), len(incremented))
+        self.assertEqual(set(AlarmRollup.objects.values_list(*fields)), incremented)
+
+
+class DeliverySummaryTest(TestCase):
+    """
+    The summaries maintained by the writers count events, not objects, and equal the summaries
+    rebuilt from the events.
+    """
+
+    def test_impurity_written_in_two_calls(self):
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='edge_box', edge_box_location='gate')
+        WasteSegments.objects.bulk_create([
+            WasteSegments(
+                edge_box=edge_box, timestamp=datetime(2024, 1, 1, 8, tzinfo=timezone.utc), object_uid=f'object-{i}',
+                object_tracker_id=i, object_polygon=[[.1, .1], [.2, .2]], confidence_score=.9, object_area=1.,
+                object_length=float(i + 1), model_name='model', model_tag='tag',
+            ) for i in range(2)
+        ])
+
+        # the objects of the event are sent one by one
+        for i, minute in enumerate((5, 6)):
+            update_waste_impurity(dict(
+                object_uid=[f'object-{i}'], event_uid='event', delivery_id='delivery', confidence_score=[.9],
+                severity_level=[i + 1], img_id=f'img-{i}', img_file=f'img-{i}.jpg', model_name='model', model_tag='tag',
+                timestamp=f'2024-01-01 08:0{minute}:00',
+            ), edge_box)
+
+        fields = (
+            'delivery_id', 'first_seen', 'last_seen', 'impurity_count', 'dust_count', 'hotspot_count',
+            'max_severity', 'event_uid', 'img_file', 'longest_object', 'longest_object_uid',
+        )
+        incremented = list(DeliverySummary.objects.values_list(*fields))
+        self.assertEqual(DeliverySummary.objects.get().impurity_count, 1)
+
+        self.assertEqual(rebuild_summaries(['delivery']), 1)
+        self.assertEqual(list(DeliverySummary.objects.values_list(*fields)), incremented)
+
+
+@skipUnless(find_spec('pyarrow'), 'pyarrow is not installed')
+class ExportColumnarTest(TestCase):
+    """
+    export_columnar writes one parquet file per day and edge box, read back by pyarrow.
+    """
+
+    def test_parquet_round_trip(self):
+        import pyarrow.parquet
+
+        plant = PlantInfo.objects.create(plant_id='plant', plant_name='plant', plant_location='location')
+        edge_box = EdgeBoxInfo.objects.create(plant=plant, edge_box_id='edge_box', edge_box_location='gate')
+        polygons = [[[.1, .2], [.3, .4]], [[.5, .5], [.6, .7], [.7, .6]]]
+        WasteSegments.objects.bulk_create([
+            WasteSegments(
+                edge_box=edge_box, timestamp=datetime(2024, 1, 1, 8, tzinfo=timezone.utc), object_uid=f'object-{i}',
+                object_tracker_id=i, object_polygon=polygon, confidence_score=.9, object_area=1., object_length=1.,
+                model_name='model', model_tag='tag',
+                # the first segment is written with its bounding box, the box of the second is computed on export
+                **(dict(xmin=.1, ymin=.2, xmax=.3, ymax=.4) if i == 0 else {}),
+            ) for i, polygon in enumerate(polygons)
+        ])
+        day = WasteSegments.objects.first().created_at.date()
+
+        with TemporaryDirectory() as output:
+            call_command(
+                'export_columnar', output=output, from_date=day.isoformat(), tables=['segments'], stdout=StringIO(),
+            )
+            table = pyarrow.parquet.read_table(partition_path(output, 'segments', day, 'edge_box', 'parquet')).to_pydict()
+
+        self.assertEqual(table['object_uid'], ['object-0', 'object-1'])
+        self.assertEqual(table['polygon'], polygons)
+        self.assertEqual(
+            list(zip(table['xmin'], table['ymin'], table['xmax'], table['ymax'])), [(.1, .2, .3, .4), (.5, .5, .7, .7)]
+        )
@@ -1,6 +1,7 @@
 from celery import current_app as c_app
 from .celery_config import settings, BaseConfig
 from celery.result import AsyncResult
+from celery.signals import worker_process_init
 
 
 def create_celery():
@@ -18,6 +19,18 @@ def create_celery():
     return celery_app
 
 
+@worker_process_init.connect
+def warm_caches(**kwargs):
+    """
+    Load the edge boxes in each worker process, the first tasks then run without lookup queries.
+    """
+    from database.cache import warm_edge_boxes
+    try:
+        print(f"Warmed edge box cache with {warm_edge_boxes()} edge boxes")
+    except Exception as err:
+        print(f"Failed to warm edge box cache: {err}")
+
+
 def get_task_info(task_id):
     """
     Retrieve information about a Celery task given its task ID.
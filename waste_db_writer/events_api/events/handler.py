@@ -1,8 +1,13 @@
+import os
 from fastapi import HTTPException
 from events_api.tasks.waste_segments.core import save_results_into_database as save_segments
 from events_api.tasks.waste_impurity.core import save_results_into_database as save_impurity
 from events_api.tasks.waste_dust.core import save_results_into_database as save_dust
 from events_api.tasks.waste_hotspot.core import save_results_into_database as save_hotspot
+from events_api.tasks.waste_segments.core import save_batch_into_database as save_segments_batch
+from events_api.tasks.waste_impurity.core import save_batch_into_database as save_impurity_batch
+from events_api.tasks.waste_dust.core import save_batch_into_database as save_dust_batch
+from events_api.tasks.waste_hotspot.core import save_batch_into_database as save_hotspot_batch
 
 
 TASK_MAPPING = {
@@ -12,6 +17,22 @@ TASK_MAPPING = {
         "waste_hotspot": save_hotspot,
 }
 
+BATCH_TASK_MAPPING = {
+        "waste_segments": save_segments_batch,
+        "waste_impurity": save_impurity_batch,
+        "waste_dust": save_dust_batch,
+        "waste_hotspot": save_hotspot_batch,
+}
+
+REQUIRED_KEYS = {
+        "waste_segments": ("object_uid",),
+        "waste_impurity": ("object_uid",),
+        "waste_dust": ("event_uid",),
+        "waste_hotspot": ("event_uid",),
+}
+
+BATCH_CHUNK_SIZE = int(os.environ.get('EVENT_BATCH_CHUNK_SIZE', 100))
+
 
 def handle_event(event):   
     return event
@@ -21,4 +42,35 @@ def task_map(event_type):
     try:
         return TASK_MAPPING[event_type]
     except Exception as err:
-        raise HTTPException(status_code=400, detail=f'Failed to map event_type {event_type} to task: {err}')
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f'Failed to map event_type {event_type} to task: {err}')
+
+
+def batch_task_map(event_type):
+    try:
+        return BATCH_TASK_MAPPING[event_type]
+    except Exception as err:
+        raise HTTPException(status_code=400, detail=f'Failed to map event_type {event_type} to batch task: {err}')
+
+
+def validate_event(event_type, event):
+    """
+    Validate a single event of a batch before it is published.
+
+    Returns None if the event can be published, otherwise a short description of the problem.
+    """
+    if event_type not in BATCH_TASK_MAPPING:
+        return f'unknown event_type {event_type}'
+
+    if not isinstance(event, dict) or not event:
+        return 'invalid request payload'
+
+    missing = [key for key in REQUIRED_KEYS[event_type] if key not in event]
+    if missing:
+        return f'missing keys: {", ".join(missing)}'
+
+    return None
+
+
+def chunked(items, size=BATCH_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
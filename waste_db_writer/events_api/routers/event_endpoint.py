@@ -43,6 +43,24 @@ class ApiRequest(BaseModel):
     request: Optional[Dict[AnyStr, Any]] = None
 
 
+class BatchApiRequest(BaseModel):
+    events: List[Any] = []
+
+
+class BatchItemResponse(BaseModel):
+    index: int
+    status: str
+    event_type: Optional[str] = None
+    task_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchApiResponse(BaseModel):
+    status: str
+    task_ids: List[str]
+    items: List[BatchItemResponse]
+
+
 router = APIRouter(
     prefix="/api/v1",
     tags=["EventAPI"],
@@ -50,6 +68,99 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def publish_batch(event_type, indexed_events, x_request_id=None):
+    """
+    Publish validated events of one event_type as chunked batch messages, one broker publish per chunk.
+    """
+    items = []
+    module = handler.batch_task_map(event_type)
+    for n, chunk in enumerate(handler.chunked(indexed_events)):
+        task_id = f"{x_request_id}-{event_type}-{n}" if x_request_id else None
+        task = module.apply_async(kwargs={"events": [event for _, event in chunk]}, task_id=task_id)
+        items.extend(
+            BatchItemResponse(index=index, status="success", event_type=event_type, task_id=task.id)
+            for index, _ in chunk
+        )
+    
+    return items
+
+
+def batch_response(items):
+    items = sorted(items, key=lambda item: item.index)
+    accepted = [item for item in items if item.status == "success"]
+    if len(accepted) == len(items):
+        batch_status = "success"
+    elif accepted:
+        batch_status = "partial"
+    else:
+        batch_status = "failed"
+    
+    task_ids = list(dict.fromkeys(item.task_id for item in accepted))
+    return BatchApiResponse(status=batch_status, task_ids=task_ids, items=items)
+
+
+@router.api_route(
+    "/event/batch", methods=["POST"], tags=["EventAPI"]
+)
+async def handle_mixed_batch(
+    payload: BatchApiRequest = Body(...),
+    x_request_id: Annotated[Optional[str], Header()] = None,
+) -> BatchApiResponse:
+    """
+    Accept events of different types in one request. Each item is {"event_type": ..., "request": {...}}.
+    """
+    if not payload.events:
+        raise HTTPException(status_code=400, detail="Invalid request payload")
+    
+    items = []
+    grouped = {}
+    for index, item in enumerate(payload.events):
+        event_type = item.get("event_type") if isinstance(item, dict) else None
+        event = item.get("request") if isinstance(item, dict) else None
+        error = handler.validate_event(event_type, event)
+        if error:
+            items.append(BatchItemResponse(index=index, status="failed", event_type=event_type, error=error))
+            continue
+        
+        grouped.setdefault(event_type, []).append((index, event))
+    
+    for event_type, indexed_events in grouped.items():
+        items.extend(publish_batch(event_type, indexed_events, x_request_id=x_request_id))
+    
+    return batch_response(items)
+
+
+@router.api_route(
+    "/event/{event_type}/batch", methods=["POST"], tags=["EventAPI"]
+)
+async def handle_batch(
+    event_type: str,
+    payload: BatchApiRequest = Body(...),
+    x_request_id: Annotated[Optional[str], Header()] = None,
+) -> BatchApiResponse:
+    """
+    Accept many events of the same type in one request and publish them as chunked batch messages.
+    """
+    if not payload.events:
+        raise HTTPException(status_code=400, detail="Invalid request payload")
+    
+    handler.batch_task_map(event_type)
+    items = []
+    indexed_events = []
+    for index, event in enumerate(payload.events):
+        error = handler.validate_event(event_type, event)
+        if error:
+            items.append(BatchItemResponse(index=index, status="failed", event_type=event_type, error=error))
+            continue
+        
+        indexed_events.append((index, event))
+    
+    if indexed_events:
+        items.extend(publish_batch(event_type, indexed_events, x_request_id=x_request_id))
+    
+    return batch_response(items)
+
+
 @router.api_route(
     "/event/{event_type}", methods=["POST"], tags=["EventAPI"]
 )
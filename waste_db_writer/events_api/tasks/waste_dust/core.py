@@ -2,9 +2,11 @@ import os
 import django
 django.setup()
 from celery import shared_task
+from django.db import transaction
 from datetime import datetime, timezone
 from database.models import WasteDust
 from utils.common import get_box_info, DATETIME_FORMAT
+from utils.response_cache import bump_generation
 
 def save_waste_dust(event, edge_box):
     success = False
@@ -28,7 +30,10 @@ def save_waste_dust(event, edge_box):
             meta_info=event.get('meta_info'),
             )
 
-        waste_dust.save()
+        # the alarm, the registry entry, the rollup and the delivery summary commit with the event
+        with transaction.atomic():
+            waste_dust.save()
+            transaction.on_commit(bump_generation)
         success = True
     except Exception as err:
         waste_dust = None
@@ -64,3 +69,36 @@ def save_results_into_database(self, **kwargs):
     )
     
     return data
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True,
+             name='waste_dust:save_batch_into_database')
+def save_batch_into_database(self, events):
+    data: dict = {}
+    
+    failed = []
+    error = None
+    for info in events:
+        try:
+            edge_box = get_box_info(edge_box_id=info.get('EDGE_BOX_ID'))
+            suc, _ = save_waste_dust(info, edge_box=edge_box)
+            if not suc:
+                raise ValueError('Failed to save waste_dust')
+        except Exception as err:
+            failed.append(info)
+            error = err
+    
+    if failed:
+        # only the events that failed are sent again, so the saved ones are not written twice
+        raise self.retry(exc=error, kwargs={'events': failed}, countdown=2 ** self.request.retries)
+    
+    data.update(
+        {
+            'action': 'done',
+            'time':  datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+            'result': 'success',
+            'count': len(events),
+        }
+    )
+    
+    return data
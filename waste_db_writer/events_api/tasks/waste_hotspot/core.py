@@ -2,10 +2,12 @@ import os
 import django
 django.setup()
 from celery import shared_task
+from django.db import transaction
 from datetime import datetime, timezone
 from database.models import WasteHotSpot
 from utils.common import get_box_info, DATETIME_FORMAT
-from utils.sync.core import sync_to_alarm
+from utils.sync.core import enqueue_sync
+from utils.response_cache import bump_generation
 
 def save_waste_hotspot(event, edge_box):
     success = False
@@ -30,13 +32,13 @@ def save_waste_hotspot(event, edge_box):
             meta_info=event.get('meta_info'),
             )
 
-        sync_to_alarm(
-            url=f"http://{os.getenv('EDGE_CLOUD_SYNC_HOST', '0.0.0.0')}:{os.getenv('EDGE_CLOUD_SYNC_PORT', '27092')}/api/v1/data",
-            model=waste_hotspot,
-            event_name='hotspot',
-        )
-        
-        waste_hotspot.save()
+        with transaction.atomic():
+            waste_hotspot.save()
+            transaction.on_commit(bump_generation)
+            enqueue_sync(
+                model=waste_hotspot,
+                event_name='hotspot',
+            )
         success = True
     except Exception as err:
         waste_hotspot = None
@@ -72,3 +74,36 @@ def save_results_into_database(self, **kwargs):
     )
     
     return data
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True,
+             name='waste_hotspot:save_batch_into_database')
+def save_batch_into_database(self, events):
+    data: dict = {}
+    
+    failed = []
+    error = None
+    for info in events:
+        try:
+            edge_box = get_box_info(edge_box_id=info.get('EDGE_BOX_ID'))
+            suc, _ = save_waste_hotspot(info, edge_box=edge_box)
+            if not suc:
+                raise ValueError('Failed to save waste_hotspot')
+        except Exception as err:
+            failed.append(info)
+            error = err
+    
+    if failed:
+        # only the events that failed are sent again, so the saved ones are not written twice
+        raise self.retry(exc=error, kwargs={'events': failed}, countdown=2 ** self.request.retries)
+    
+    data.update(
+        {
+            'action': 'done',
+            'time':  datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+            'result': 'success',
+            'count': len(events),
+        }
+    )
+    
+    return data
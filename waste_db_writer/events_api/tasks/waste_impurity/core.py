@@ -2,10 +2,17 @@ import os
 import django
 django.setup()
 from celery import shared_task
+from django.db import transaction
 from datetime import datetime, timezone
-from database.models import PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity
+from database.models import PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity, WasteAlarm, EventRegistry
 from utils.common import get_box_info, DATETIME_FORMAT
-from utils.sync.core import sync_to_alarm
+from utils.sync.core import enqueue_sync
+from utils.response_cache import bump_generation
+from utils.alarm_stream import publish_alarms
+from utils.alarm_rollup import increment_rollups
+from utils.delivery_summary import summarize_events
+from utils.convertor import polys2xyxy
+from utils.roi import assign_regions
 
 def update_waste_impurity(objects, edge_box):
     success = False
@@ -15,10 +22,26 @@ def update_waste_impurity(objects, edge_box):
         if isinstance(timestamp, str):
             timestamp = datetime.strptime(timestamp, DATETIME_FORMAT).replace(tzinfo=timezone.utc)
         
+        object_uids = objects.get('object_uid', [])
+        waste_segments = {
+            ws.object_uid: ws for ws in WasteSegments.objects.filter(object_uid__in=object_uids, edge_box=edge_box)
+        }
+        missing = [object_uid for object_uid in object_uids if object_uid not in waste_segments]
+        if missing:
+            raise WasteSegments.DoesNotExist(f'WasteSegments matching query does not exist: {missing}')
+        
+        # the region sent by the edge box wins over the ROI of the segment, assigned here for segments written without it
+        region = (objects.get('meta_info') or {}).get('region')
+        without_region = [ws for ws in waste_segments.values() if ws.region is None]
+        if without_region:
+            for ws, ws_region in zip(without_region, assign_regions(polys2xyxy([ws.object_polygon for ws in without_region]), edge_box)):
+                ws.region = ws_region
+        
         wi = None
         best_sv = -1
-        for i in range(len(objects.get('object_uid', []))):
-            waste_segment = WasteSegments.objects.get(object_uid=objects.get('object_uid')[i], edge_box=edge_box)
+        waste_impurities = []
+        for i in range(len(object_uids)):
+            waste_segment = waste_segments[object_uids[i]]
             
             waste_impurity = WasteImpurity()
             waste_impurity.edge_box = edge_box
@@ -27,6 +50,7 @@ def update_waste_impurity(objects, edge_box):
             waste_impurity.event_uid = objects.get('event_uid')
             waste_impurity.delivery_id =  objects.get('delivery_id') 
             waste_impurity.location = objects.get('location')
+            waste_impurity.region = region or waste_segment.region
             waste_impurity.is_problematic = True
             waste_impurity.is_long = True
             waste_impurity.object_tracker_id = waste_segment.object_tracker_id
@@ -37,26 +61,37 @@ def update_waste_impurity(objects, edge_box):
             waste_impurity.img_id = objects.get('img_id')
             waste_impurity.img_file = objects.get('img_file')
             waste_impurity.meta_info = objects.get('meta_info')
-            waste_impurity.save()
+            waste_impurities.append(waste_impurity)
             
             waste_segment.img_id = objects.get('img_id')
             waste_segment.img_file = objects.get('img_file')
-            waste_segment.save()
 
             if waste_impurity.severity_level > best_sv:
                 wi = waste_impurity
                 best_sv = waste_impurity.severity_level
         
-        if wi:
-            sync_to_alarm(
-                url=f"http://{os.getenv('EDGE_CLOUD_SYNC_HOST', '0.0.0.0')}:{os.getenv('EDGE_CLOUD_SYNC_PORT', '27092')}/api/v1/data",
-                model=wi,
-                event_name='impurity',
-                meta_info={
-                    "object_size": wi.object_uid.object_length,
-                    "xyn": wi.object_uid.object_polygon,
-                }
-            )
+        # bulk_create skips WasteImpurity.save(), the alarms, the registry entry, the delivery summary and the rollups are written explicitly
+        with transaction.atomic():
+            WasteImpurity.objects.bulk_create(waste_impurities)
+            waste_alarms = WasteAlarm.objects.bulk_create([waste_impurity.to_alarm() for waste_impurity in waste_impurities])
+            WasteSegments.objects.bulk_update(waste_segments.values(), ['img_id', 'img_file', 'region'])
+            if wi:
+                EventRegistry.register(wi.event_uid, 'impurity', wi.severity_level)
+            summarize_events(waste_impurities)
+            # last, the rollup rows of the hour are shared by the writers
+            increment_rollups(waste_alarms)
+            transaction.on_commit(bump_generation)
+            transaction.on_commit(lambda: publish_alarms([waste_alarm.id for waste_alarm in waste_alarms]))
+            
+            if wi:
+                enqueue_sync(
+                    model=wi,
+                    event_name='impurity',
+                    meta_info={
+                        "object_size": wi.object_uid.object_length,
+                        "xyn": wi.object_uid.object_polygon,
+                    }
+                )
         
         success = True
     except Exception as err:
@@ -92,4 +127,37 @@ def save_results_into_database(self, **kwargs):
         }
     )
     
-    return data
\ No newline at end of file
+    return data
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True,
+             name='waste_impurity:save_batch_into_database')
+def save_batch_into_database(self, events):
+    data: dict = {}
+    
+    failed = []
+    error = None
+    for info in events:
+        try:
+            edge_box = get_box_info(edge_box_id=info.get('EDGE_BOX_ID'))
+            suc = update_waste_impurity(objects=info, edge_box=edge_box)
+            if not suc:
+                raise ValueError('Failed to update waste_impurity')
+        except Exception as err:
+            failed.append(info)
+            error = err
+    
+    if failed:
+        # only the events that failed are sent again, so the saved ones are not written twice
+        raise self.retry(exc=error, kwargs={'events': failed}, countdown=2 ** self.request.retries)
+    
+    data.update(
+        {
+            'action': 'done',
+            'time':  datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+            'result': 'success',
+            'count': len(events),
+        }
+    )
+    
+    return data
@@ -0,0 +1,218 @@
+"""
+Micro-batching consumer for the waste_segments queue.
+
+The celery worker runs one task, and one transaction, per frame. This consumer reads the same
+celery messages from the waste_segments queue, drains up to WASTE_SEGMENTS_BATCH_SIZE messages
+or waits WASTE_SEGMENTS_BATCH_TIMEOUT_MS after the first one, merges their segments and writes
+them with one bulk_create inside one transaction. Every message is acked or retried on its own.
+
+A message that fails is retried like the celery task it replaces (retry_backoff, max_retries=5):
+it is published to the delay queue waste_segments.retry.<n>, whose messages expire after 2 ** n
+seconds back into waste_segments, with its retry count in a header. After MAX_RETRIES retries it
+is parked in waste_segments.failed for inspection instead of being dropped.
+
+It replaces the celery worker of the waste_segments queue (see supervisord.conf):
+
+    python3 -m events_api.tasks.waste_segments.batch
+"""
+import os
+import time
+import socket
+import django
+django.setup()
+from kombu import Connection, Queue
+from django.db import transaction, close_old_connections
+from database.models import WasteSegments
+from events_api.config.celery_config import settings
+from events_api.tasks.waste_segments.core import build_waste_segments, existing_object_uids
+from utils.common import get_box_info
+
+QUEUE_NAME = 'waste_segments'
+BATCH_TASK_NAME = 'waste_segments:save_batch_into_database'
+BATCH_SIZE = int(os.environ.get('WASTE_SEGMENTS_BATCH_SIZE', 500))
+BATCH_TIMEOUT_MS = int(os.environ.get('WASTE_SEGMENTS_BATCH_TIMEOUT_MS', 200))
+MAX_RETRIES = int(os.environ.get('WASTE_SEGMENTS_MAX_RETRIES', 5))
+RETRIES_HEADER = 'x-segments-retries'
+FAILED_QUEUE = Queue(f'{QUEUE_NAME}.failed', routing_key=f'{QUEUE_NAME}.failed')
+
+
+def retry_queue(retries):
+    """
+    Delay queue of the given retry: its messages expire after 2 ** retries seconds and are
+    dead-lettered back to QUEUE_NAME through the default exchange.
+    """
+    name = f'{QUEUE_NAME}.retry.{retries}'
+    return Queue(
+        name,
+        routing_key=name,
+        queue_arguments={
+            'x-message-ttl': 1000 * 2 ** retries,
+            'x-dead-letter-exchange': '',
+            'x-dead-letter-routing-key': QUEUE_NAME,
+        },
+    )
+
+
+def decode_events(message):
+    """
+    Return the list of events carried by a celery task message of the waste_segments queue.
+    """
+    body = message.decode()
+    if isinstance(body, dict):
+        # celery message protocol 1
+        task, kwargs = body.get('task'), body.get('kwargs') or {}
+    else:
+        task, kwargs = message.headers.get('task'), body[1]
+
+    if task == BATCH_TASK_NAME:
+        return kwargs.get('events', [])
+
+    return [kwargs]
+
+
+class SegmentsBatchConsumer:
+    def __init__(self, broker_url=settings.CELERY_BROKER_URL, batch_size=BATCH_SIZE, timeout_ms=BATCH_TIMEOUT_MS):
+        self.broker_url = broker_url
+        self.batch_size = batch_size
+        self.timeout = timeout_ms / 1000.
+        self.pending = []
+        self.producer = None
+
+    def on_message(self, body, message):
+        self.pending.append(message)
+
+    def run(self):
+        with Connection(self.broker_url) as conn:
+            self.producer = conn.Producer()
+            with conn.Consumer(Queue(QUEUE_NAME), callbacks=[self.on_message], accept=['json', 'pickle']) as consumer:
+                consumer.qos(prefetch_count=self.batch_size)
+                print(f"Consuming {QUEUE_NAME} in batches of {self.batch_size} messages / {self.timeout * 1000:.0f} ms")
+                while True:
+                    self.drain(conn)
+                    if self.pending:
+                        self.flush()
+
+    def drain(self, conn):
+        """
+        Block until a first message arrives, then collect until the batch is full or the timeout expires.
+        """
+        deadline = None
+        while len(self.pending) < self.batch_size:
+            if self.pending and deadline is None:
+                deadline = time.monotonic() + self.timeout
+
+            timeout = 1. if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                conn.drain_events(timeout=timeout)
+            except socket.timeout:
+                if deadline is not None:
+                    break
+
+    def flush(self):
+        messages, self.pending = self.pending, []
+        close_old_connections()
+
+        edge_boxes = {}
+        decoded = []
+        for message in messages:
+            try:
+                events = []
+                for info in decode_events(message):
+                    edge_box_id = info.get('EDGE_BOX_ID')
+                    if edge_box_id not in edge_boxes:
+                        edge_boxes[edge_box_id] = get_box_info(edge_box_id=edge_box_id)
+                    events.append((info, edge_boxes[edge_box_id]))
+            except Exception as err:
+                self.reject(message, err)
+                continue
+
+            decoded.append((message, events))
+
+        # one dedupe query per edge box for the whole batch
+        object_uids = {}
+        for _, events in decoded:
+            for info, edge_box in events:
+                object_uids.setdefault(edge_box.pk, set()).update(info.get('object_uid', []))
+        existing = {
+            edge_box.pk: existing_object_uids(edge_box, object_uids.get(edge_box.pk, ()))
+            for edge_box in edge_boxes.values()
+        }
+
+        batch = []
+        for message, events in decoded:
+            try:
+                waste_segments = []
+                for info, edge_box in events:
+                    waste_segments.extend(build_waste_segments(info, edge_box=edge_box, existing=existing[edge_box.pk]))
+            except Exception as err:
+                self.reject(message, err)
+                continue
+
+            # the same object is reported by consecutive frames of the batch
+            for ws in waste_segments:
+                existing[ws.edge_box_id].add(ws.object_uid)
+            batch.append((message, waste_segments))
+
+        if not batch:
+            return
+
+        try:
+            with transaction.atomic():
+                # segments written concurrently by another worker are skipped by the unique constraint
+                WasteSegments.objects.bulk_create([ws for _, waste_segments in batch for ws in waste_segments], ignore_conflicts=True)
+        except Exception as err:
+            print(f"Failed to save batch of {len(batch)} messages, saving them one by one: {err}")
+            for message, waste_segments in batch:
+                try:
+                    with transaction.atomic():
+                        WasteSegments.objects.bulk_create(waste_segments, ignore_conflicts=True)
+                except Exception as err:
+                    self.reject(message, err)
+                    continue
+
+                message.ack()
+            return
+
+        for message, _ in batch:
+            message.ack()
+
+        print(f"Saved {sum(len(ws) for _, ws in batch)} waste_segments from {len(batch)} messages")
+
+    def reject(self, message, err):
+        """
+        Publish a copy of a failed message to the delay queue of its next retry, or to FAILED_QUEUE
+        after MAX_RETRIES, then ack it. If the copy cannot be published the message is requeued.
+        """
+        headers = dict(message.headers or {})
+        retries = int(headers.get(RETRIES_HEADER, 0)) + 1
+        headers[RETRIES_HEADER] = retries
+        queue = retry_queue(retries) if retries <= MAX_RETRIES else FAILED_QUEUE
+        print(f"Failed message, retry {retries}/{MAX_RETRIES} through {queue.name}: {err}")
+
+        properties = message.properties or {}
+        try:
+            self.producer.publish(
+                message.body,
+                exchange='',
+                routing_key=queue.name,
+                declare=[queue],
+                headers=headers,
+                content_type=message.content_type,
+                content_encoding=message.content_encoding,
+                delivery_mode=2,
+                correlation_id=properties.get('correlation_id'),
+                reply_to=properties.get('reply_to'),
+            )
+        except Exception as publish_err:
+            print(f"Failed to publish retry, requeuing message: {publish_err}")
+            message.reject(requeue=True)
+            return
+
+        message.ack()
+
+
+if __name__ == "__main__":
+    SegmentsBatchConsumer().run()
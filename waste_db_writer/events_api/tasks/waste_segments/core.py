@@ -1,40 +1,75 @@
 import os
+import math
 import django
 django.setup()
 from celery import shared_task
 from datetime import datetime, timezone
 from database.models import PlantInfo, EdgeBoxInfo, WasteSegments, WasteImpurity
 from utils.common import get_box_info, DATETIME_FORMAT
+from utils.convertor import polys2xyxy
+from utils.roi import assign_regions
 
-def save_waste_segments(objects, edge_box):
-    success = False
-    try:
-        assert 'object_uid' in objects.keys(), f'object_uid not Found'
-        timestamp = objects.get('timestamp', datetime.now(tz=timezone.utc))
-        if isinstance(timestamp, str):
-            timestamp = datetime.strptime(timestamp, DATETIME_FORMAT).replace(tzinfo=timezone.utc)
-            
-        waste_segments = [
+def existing_object_uids(edge_box, object_uids):
+    """
+    Return the subset of object_uids already stored for edge_box, in one query.
+    """
+    return set(
+        WasteSegments.objects.filter(edge_box=edge_box, object_uid__in=set(object_uids)).values_list('object_uid', flat=True)
+    )
+
+def build_waste_segments(objects, edge_box, existing=None):
+    assert 'object_uid' in objects.keys(), f'object_uid not Found'
+    timestamp = objects.get('timestamp', datetime.now(tz=timezone.utc))
+    if isinstance(timestamp, str):
+        timestamp = datetime.strptime(timestamp, DATETIME_FORMAT).replace(tzinfo=timezone.utc)
+    
+    object_uids = objects.get('object_uid', [])
+    if existing is None:
+        existing = existing_object_uids(edge_box, object_uids)
+    
+    # bounding boxes and regions of the whole payload at once, None for an empty polygon
+    xyxy = polys2xyxy(objects.get('object_polygon', []))
+    regions = assign_regions(xyxy, edge_box)
+    xyxy = [[None if math.isnan(v) else v for v in box] for box in xyxy.tolist()]
+    
+    waste_segments = []
+    seen = set(existing)
+    for i in range(len(object_uids)):
+        if object_uids[i] in seen:
+            continue
+        
+        seen.add(object_uids[i])
+        waste_segments.append(
             WasteSegments(
                 edge_box = edge_box,
                 timestamp = timestamp,
-                object_uid = objects.get('object_uid')[i],
+                object_uid = object_uids[i],
                 object_tracker_id = objects.get('object_tracker_id')[i],
                 object_polygon = objects.get('object_polygon')[i],
                 confidence_score = objects.get('confidence_score')[i],
                 object_area = objects.get('object_area')[i],
                 object_length = objects.get('object_length')[i],
+                xmin = xyxy[i][0],
+                ymin = xyxy[i][1],
+                xmax = xyxy[i][2],
+                ymax = xyxy[i][3],
+                region = regions[i],
                 img_id = objects.get('img_id'),
                 img_file = objects.get('img_file'),
                 model_name = objects.get('model_name'),
                 model_tag = objects.get('model_tag'),
                 meta_info=objects.get('meta_info'),
-                
-            ) for i in range(len(objects.get('object_uid', []))) 
-            if not WasteSegments.objects.filter(object_uid=objects.get('object_uid')[i], edge_box=edge_box).exists()
-        ]
+            )
+        )
+    
+    return waste_segments
 
-        WasteSegments.objects.bulk_create(waste_segments)
+def save_waste_segments(objects, edge_box):
+    success = False
+    try:
+        waste_segments = build_waste_segments(objects, edge_box=edge_box)
+        # a segment written concurrently by another worker is skipped by the unique constraint
+        WasteSegments.objects.bulk_create(waste_segments, ignore_conflicts=True)
         success = True
     except Exception as err:
         waste_segments = None
@@ -101,3 +136,36 @@ def save_results_into_database(self, **kwargs):
     )
     
     return data
+
+
+@shared_task(bind=True, max_retries=5, ignore_result=True,
+             name='waste_segments:save_batch_into_database')
+def save_batch_into_database(self, events):
+    data: dict = {}
+    
+    failed = []
+    error = None
+    for info in events:
+        try:
+            edge_box = get_box_info(edge_box_id=info.get('EDGE_BOX_ID'))
+            suc, _ = save_waste_segments(info, edge_box=edge_box)
+            if not suc:
+                raise ValueError('Failed to save waste_segments')
+        except Exception as err:
+            failed.append(info)
+            error = err
+    
+    if failed:
+        # only the events that failed are sent again, so the saved ones are not written twice
+        raise self.retry(exc=error, kwargs={'events': failed}, countdown=2 ** self.request.retries)
+    
+    data.update(
+        {
+            'action': 'done',
+            'time':  datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+            'result': 'success',
+            'count': len(events),
+        }
+    )
+    
+    return data
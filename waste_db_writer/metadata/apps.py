@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class MetadataConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'metadata'
+
+    def ready(self):
+        # connects the receivers invalidating the metadata caches
+        from metadata import signals
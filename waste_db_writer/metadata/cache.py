@@ -0,0 +1,69 @@
+import os
+from django.db.models import Q
+from utils.cache import VersionedCache
+from metadata.models import Filter
+
+METADATA_CACHE_TTL = float(os.environ.get('METADATA_CACHE_TTL', 60))
+
+# lookups a client may append to an active filter name, e.g. severity_level__gte=2
+ALLOWED_LOOKUPS = ('exact', 'in', 'gt', 'gte', 'lt', 'lte', 'contains')
+
+# localized metadata documents served by GET /alarm/metadata/{language}, keyed by (metadata_id, language)
+metadata_cache = VersionedCache(ttl=METADATA_CACHE_TTL, maxsize=64)
+
+# names of the active filters
+filter_cache = VersionedCache(ttl=METADATA_CACHE_TTL)
+
+# Q objects compiled from the filters query string of GET /alarm, keyed by the raw string
+lookup_cache = VersionedCache(ttl=METADATA_CACHE_TTL, maxsize=256)
+
+CACHES = [metadata_cache, filter_cache, lookup_cache]
+
+def invalidate_all():
+    for cache in CACHES:
+        cache.invalidate()
+
+def active_filters():
+    return filter_cache.get(
+        'active', lambda: frozenset(Filter.objects.filter(is_active=True).values_list('filter_name', flat=True))
+    )
+
+def parse_filters(filters:str):
+    """
+    Compile a filters query string, e.g. event=impurity,dust&severity_level__gte=2, into a Q object.
+
+    Filters that are not active and lookups that are not allowed are ignored, several values
+    without a lookup match any of them and the value all matches everything. Raises ValueError if
+    a filter has no value.
+    """
+    names = active_filters()
+    lookup_filters = Q()
+    for s in filters.split('&'):
+        if not s.strip():
+            continue
+
+        if '=' not in s:
+            raise ValueError(f"filter {s.strip()} has no value")
+
+        g_filter, values = s.split('=', 1)
+        g_filter = g_filter.strip()
+        values = [v.strip() for v in values.split(',') if v.strip()]
+        key, _, lookup = g_filter.partition('__')
+        if not key in names or (lookup and lookup not in ALLOWED_LOOKUPS):
+            continue
+
+        if not values:
+            raise ValueError(f"filter {g_filter} has no value")
+
+        if not lookup and 'all' in values:
+            continue
+
+        if lookup == 'in' or (not lookup and len(values) > 1):
+            lookup_filters &= Q((f"{key}__in", values))
+        else:
+            lookup_filters &= Q((g_filter, values[0]))
+
+    return lookup_filters
+
+def compiled_filters(filters:str):
+    return lookup_cache.get(filters, lambda: parse_filters(filters))
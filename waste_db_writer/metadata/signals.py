@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from metadata.models import Metadata, MetadataColumn, MetadataLocalization, Filter, FilterItem, FilterLocalization, FilterItemLocalization
+from metadata.cache import invalidate_all
+
+METADATA_MODELS = (Metadata, MetadataColumn, MetadataLocalization, Filter, FilterItem, FilterLocalization, FilterItemLocalization)
+
+
+@receiver([post_save, post_delete])
+def invalidate_metadata_cache(sender, **kwargs):
+    if sender in METADATA_MODELS:
+        invalidate_all()
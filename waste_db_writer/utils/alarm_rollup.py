@@ -0,0 +1,72 @@
+from collections import Counter
+from datetime import datetime, timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+from database.models import WasteAlarm, AlarmRollup
+
+KEY_FIELDS = ('bucket', 'event', 'edge_box_id', 'region', 'severity_level')
+
+
+def rollup_key(alarm):
+    return (
+        alarm.created_at.replace(minute=0, second=0, microsecond=0),
+        alarm.event,
+        alarm.edge_box_id,
+        alarm.region or '',
+        alarm.severity_level,
+    )
+
+def increment_rollups(alarms):
+    """
+    Count new alarms in their hourly rollups, one UPDATE per rollup, or an INSERT for the first
+    alarm of the hour. Call it in the transaction writing the alarms so that the counts commit with them.
+    """
+    # always in the same order, two writers of the same rollups wait for each other instead of deadlocking
+    for key, count in sorted(Counter(rollup_key(alarm) for alarm in alarms).items()):
+        filters = dict(zip(KEY_FIELDS, key))
+        if AlarmRollup.objects.filter(**filters).update(count=F('count') + count):
+            continue
+
+        try:
+            with transaction.atomic():
+                AlarmRollup.objects.create(count=count, **filters)
+        except IntegrityError:
+            # created meanwhile by another writer
+            AlarmRollup.objects.filter(**filters).update(count=F('count') + count)
+
+
+def compact_rollups(from_date, to_date):
+    """
+    Rebuild the rollups of the hours from from_date to to_date from the alarms, which repairs counts
+    missed by the writers, e.g. for alarms written or deleted outside of them. Return the number of
+    rollups written.
+
+    Only closed hours are rebuilt, to_date is limited to the start of the current hour: the writers
+    still increment its rollups and their counts would be lost between the delete and the insert.
+    """
+    from_date = from_date.replace(minute=0, second=0, microsecond=0)
+    to_date = min(to_date, datetime.now(tz=timezone.utc).replace(minute=0, second=0, microsecond=0))
+    if from_date >= to_date:
+        return 0
+
+    rows = (
+        WasteAlarm.objects.filter(created_at__gte=from_date, created_at__lt=to_date)
+        .annotate(bucket=TruncHour('created_at'))
+        .values('bucket', 'event', 'edge_box_id', 'region', 'severity_level')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    rollups = {}
+    for row in rows.iterator():
+        # a null region and an empty one share the rollup
+        key = (row['bucket'], row['event'], row['edge_box_id'], row['region'] or '', row['severity_level'])
+        rollups[key] = rollups.get(key, 0) + row['count']
+
+    with transaction.atomic():
+        AlarmRollup.objects.filter(bucket__gte=from_date, bucket__lt=to_date).delete()
+        AlarmRollup.objects.bulk_create(
+            [AlarmRollup(count=count, **dict(zip(KEY_FIELDS, key))) for key, count in rollups.items()], batch_size=1000
+        )
+
+    return len(rollups)
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from django.db import close_old_connections
+from django.db.models import Max
+from database.models import WasteAlarm
+
+# with a redis url the writers publish the ids of new alarms, without it the data_api polls the alarm table
+ALARM_STREAM_URL = os.environ.get('ALARM_STREAM_URL')
+ALARM_STREAM_CHANNEL = os.environ.get('ALARM_STREAM_CHANNEL', 'waste_alarms')
+ALARM_STREAM_POLL_INTERVAL = float(os.environ.get('ALARM_STREAM_POLL_INTERVAL', 2.))
+
+_redis = None
+
+def redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(ALARM_STREAM_URL)
+    return _redis
+
+def publish_alarms(ids):
+    """
+    Notify the alarm streams of new alarms. Call it once the alarms are committed, with
+    transaction.on_commit. Without ALARM_STREAM_URL the streams find new alarms by polling.
+    """
+    if not ALARM_STREAM_URL or not ids:
+        return
+
+    try:
+        redis_client().publish(ALARM_STREAM_CHANNEL, json.dumps(list(ids)))
+    except Exception as err:
+        print(f"Failed to publish alarms {ids}: {err}")
+
+
+class AlarmNotifier:
+    """
+    Fan-out of new alarm notifications to the alarm streams of the process.
+
+    One background thread either listens to the redis channel or polls the last alarm id, and
+    wakes up the queue of every subscribed stream with the list of new alarm ids, empty when polling.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        queue = asyncio.Queue()
+        with self._lock:
+            self.subscribers.add((asyncio.get_running_loop(), queue))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self.subscribers = {s for s in self.subscribers if s[1] is not queue}
+
+    def notify(self, ids):
+        with self._lock:
+            subscribers = list(self.subscribers)
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, ids)
+
+    def run(self):
+        while True:
+            try:
+                if ALARM_STREAM_URL:
+                    self.listen()
+                else:
+                    self.poll()
+            except Exception as err:
+                print(f"Alarm notifier error: {err}")
+                time.sleep(ALARM_STREAM_POLL_INTERVAL)
+
+    def listen(self):
+        pubsub = redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(ALARM_STREAM_CHANNEL)
+        # alarms published while the channel was not listened to are caught by the streams' id query
+        self.notify([])
+        for message in pubsub.listen():
+            self.notify(json.loads(message['data']))
+
+    def poll(self):
+        last_id = None
+        while True:
+            if not self.subscribers:
+                time.sleep(ALARM_STREAM_POLL_INTERVAL)
+                continue
+
+            close_old_connections()
+            current = WasteAlarm.objects.aggregate(last_id=Max('id'))['last_id']
+            if current != last_id:
+                last_id = current
+                self.notify([])
+            time.sleep(ALARM_STREAM_POLL_INTERVAL)
+
+notifier = AlarmNotifier()
@@ -1,50 +1,168 @@
 # motion_api.py
+import os
+import time
+import random
 import logging
+import threading
 import requests
-from requests.exceptions import HTTPError
-from dataclasses import dataclass
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from dataclasses import dataclass, field
+
+HTTP_POOL_CONNECTIONS = int(os.environ.get('HTTP_POOL_CONNECTIONS', 4))
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 10))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10.))
+HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get('HTTP_BACKOFF_FACTOR', 0.5))
+
+
+def connect_failed(err):
+    """
+    True if the request failed before it was sent: the connection could not be opened (refused,
+    unresolved host, connect timeout). A reset or protocol error after the request was sent is not.
+    """
+    if isinstance(err, requests.exceptions.ConnectTimeout):
+        return True
+
+    # with retries disabled, requests wraps the urllib3 MaxRetryError whose reason is the failure,
+    # NewConnectionError and NameResolutionError derive from ConnectTimeoutError
+    reason = getattr(err.args[0], 'reason', None) if err.args else None
+    return isinstance(reason, ConnectTimeoutError)
+
+
+class APIError(ValueError):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
 
 @dataclass
 class BaseAPI:
+    """
+    HTTP client keeping one pooled keep-alive session per target host.
+
+    Failures to open the connection are retried up to max_retries times with a jittered exponential
+    backoff. Any other error, e.g. a connection reset after the request was sent, is raised at once
+    so that a POST is never sent twice. stats() reports per host the number of
+    requests, connections opened and reused, and the latency.
+    """
+    pool_connections: int = HTTP_POOL_CONNECTIONS
+    pool_maxsize: int = HTTP_POOL_MAXSIZE
+    connect_timeout: float = HTTP_CONNECT_TIMEOUT
+    read_timeout: float = HTTP_READ_TIMEOUT
+    max_retries: int = HTTP_MAX_RETRIES
+    backoff_factor: float = HTTP_BACKOFF_FACTOR
+    _sessions: dict = field(default_factory=dict, init=False, repr=False)
+    _stats: dict = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def session(self, url):
+        host = "{0.scheme}://{0.netloc}".format(urlsplit(url))
+        with self._lock:
+            if host not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[host] = session
+                self._stats[host] = {'requests': 0, 'retries': 0, 'errors': 0, 'latency_total': 0., 'latency_max': 0.}
+        return host, self._sessions[host]
+
+    def request(self, method, url, **kwargs):
+        host, session = self.session(url)
+        for attempt in range(self.max_retries + 1):
+            before = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=(self.connect_timeout, self.read_timeout), **kwargs)
+            except requests.exceptions.ConnectionError as err:
+                self._record(host, time.perf_counter() - before, error=True)
+                if attempt == self.max_retries or not connect_failed(err):
+                    raise
+
+                with self._lock:
+                    self._stats[host]['retries'] += 1
+                time.sleep(random.uniform(0, self.backoff_factor * 2 ** attempt))
+                continue
+
+            self._record(host, time.perf_counter() - before)
+            return response
+
+    def _record(self, host, duration, error=False):
+        with self._lock:
+            stats = self._stats[host]
+            stats['requests'] += 1
+            stats['errors'] += int(error)
+            stats['latency_total'] += duration
+            stats['latency_max'] = max(stats['latency_max'], duration)
+
+    def stats(self):
+        results = {}
+        with self._lock:
+            for host, session in self._sessions.items():
+                stats = self._stats[host]
+                pools = session.get_adapter(host).poolmanager.pools
+                opened = sum(pools[key].num_connections for key in pools.keys())
+                results[host] = {
+                    'requests': stats['requests'],
+                    'retries': stats['retries'],
+                    'errors': stats['errors'],
+                    'connections_opened': opened,
+                    'connections_reused': max(stats['requests'] - stats['errors'] - opened, 0),
+                    'latency_avg_ms': 1000 * stats['latency_total'] / stats['requests'] if stats['requests'] else 0.,
+                    'latency_max_ms': 1000 * stats['latency_max'],
+                }
+        return results
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
     def get(self, url, params):
         results = {}
         try:
-            response = requests.get(url=url, params=params)
-            
+            response = self.request('GET', url=url, params=params)
+
             if response.status_code != 200:
                 err = response.json().get('error')
-                raise HTTPError(
-                    f"HttpError Occured: {response.status_code}: {err}"
-                ) 
-            
+                raise APIError(
+                    f"HttpError Occured: {response.status_code}: {err}",
+                    status_code=response.status_code,
+                )
+
             results = response.json().get('data')
             return  results
-        
-        except HTTPError as err:
-            raise ValueError(f"HTTPError getting data from {url}: {err}")
+
+        except APIError as err:
+            raise APIError(f"HTTPError getting data from {url}: {err}", status_code=err.status_code)
         except Exception as err:
-            raise ValueError(f"Exeception Error getting data from {url}: {err}")
-            
-        
+            raise APIError(f"Exeception Error getting data from {url}: {err}")
+
+
     def post(self, url, params=None, payload=None):
         try:
-            
+
             print(f"Request to {url} ...", end='')
-            response = requests.post(
+            response = self.request(
+                'POST',
                 url=url,
                 params=params,
                 json=payload,
             )
-            
+
             if response.status_code != 200:
-                raise HTTPError(
-                    f"HTTPError: {response.status_code}: {response.json()}"
+                raise APIError(
+                    f"HTTPError: {response.status_code}: {response.text}",
+                    status_code=response.status_code,
                 )
-            
+
             print("Success!")
-            
-        except HTTPError as err:
-            raise ValueError(f"HTTPError posting data to {url}: {err}")
+            return response
+
+        except APIError as err:
+            raise APIError(f"HTTPError posting data to {url}: {err}", status_code=err.status_code)
         except Exception as err:
-            raise ValueError(f"Exeception Error posting error to {url}: {err}")
-            
\ No newline at end of file
+            raise APIError(f"Exeception Error posting error to {url}: {err}")
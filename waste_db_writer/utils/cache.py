@@ -0,0 +1,55 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class VersionedCache:
+    """
+    In-process cache of values built from the database.
+
+    invalidate() bumps the version, entries built under an older version are rebuilt on the next
+    get(), including an entry whose build was running while the version changed. Signals only fire
+    in the process that saved the model, so ttl bounds how long another process serves a stale entry.
+    With maxsize the least recently used entries are evicted.
+    """
+
+    def __init__(self, ttl:float=60., maxsize:int=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """
+        Return the value cached under key, built with build() if missing, stale or expired.
+        """
+        now = time.monotonic()
+        with self._lock:
+            version = self.version
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[2]
+
+        value = build()
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = (version, now + self.ttl, value)
+                self._entries.move_to_end(key)
+                if self.maxsize is not None and len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
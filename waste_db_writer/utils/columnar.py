@@ -0,0 +1,217 @@
+import os
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from database.models import WasteSegments, WasteImpurity
+from utils.convertor import polys2xyxy
+
+# pyarrow is optional, it is only imported by the parquet and arrow exports
+COLUMNAR_CHUNK_SIZE = int(os.environ.get('COLUMNAR_CHUNK_SIZE', 10000))
+COLUMNAR_SINK_BLOCK = 1 << 20
+
+MEDIA_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+}
+FORMATS = tuple(MEDIA_TYPES.keys())
+
+TABLES = {
+    'segments': WasteSegments,
+    'impurity': WasteImpurity,
+}
+
+# (column, lookup, type), the polygon column is followed by its bounding box
+COLUMNS = {
+    'segments': [
+        ('id', 'id', 'int64'),
+        ('edge_box_id', 'edge_box__edge_box_id', 'string'),
+        ('timestamp', 'timestamp', 'timestamp'),
+        ('created_at', 'created_at', 'timestamp'),
+        ('object_uid', 'object_uid', 'string'),
+        ('event_uid', 'event_uid', 'string'),
+        ('delivery_id', 'delivery_id', 'string'),
+        ('location', 'location', 'string'),
+        ('object_tracker_id', 'object_tracker_id', 'int64'),
+        ('confidence_score', 'confidence_score', 'float64'),
+        ('object_area', 'object_area', 'float64'),
+        ('object_length', 'object_length', 'float64'),
+        ('img_id', 'img_id', 'string'),
+        ('img_file', 'img_file', 'string'),
+        ('model_name', 'model_name', 'string'),
+        ('model_tag', 'model_tag', 'string'),
+        ('polygon', 'object_polygon', 'polygon'),
+    ],
+    'impurity': [
+        ('id', 'id', 'int64'),
+        ('edge_box_id', 'edge_box__edge_box_id', 'string'),
+        ('timestamp', 'timestamp', 'timestamp'),
+        ('created_at', 'created_at', 'timestamp'),
+        ('object_uid', 'object_uid__object_uid', 'string'),
+        ('event_uid', 'event_uid', 'string'),
+        ('delivery_id', 'delivery_id', 'string'),
+        ('location', 'location', 'string'),
+        ('object_tracker_id', 'object_tracker_id', 'int64'),
+        ('is_long', 'is_long', 'bool'),
+        ('is_problematic', 'is_problematic', 'bool'),
+        ('confidence_score', 'confidence_score', 'float64'),
+        ('severity_level', 'severity_level', 'int64'),
+        ('img_id', 'img_id', 'string'),
+        ('img_file', 'img_file', 'string'),
+        ('model_name', 'model_name', 'string'),
+        ('model_tag', 'model_tag', 'string'),
+        ('polygon', 'object_uid__object_polygon', 'polygon'),
+    ],
+}
+BBOX_COLUMNS = ['xmin', 'ymin', 'xmax', 'ymax']
+# stored bounding box, computed from the polygon for the rows written before the columns were added
+BBOX_LOOKUPS = {
+    'segments': ['xmin', 'ymin', 'xmax', 'ymax'],
+    'impurity': ['object_uid__xmin', 'object_uid__ymin', 'object_uid__xmax', 'object_uid__ymax'],
+}
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as err:
+        raise ImportError("pyarrow is required for the parquet and arrow exports, install it with pip install pyarrow") from err
+    return pyarrow
+
+def arrow_type(pa, kind):
+    return {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'bool': pa.bool_(),
+        'string': pa.string(),
+        'timestamp': pa.timestamp('us', tz='UTC'),
+        'polygon': pa.list_(pa.list_(pa.float64())),
+    }[kind]
+
+def schema(table):
+    pa = require_pyarrow()
+    return pa.schema(
+        [(column, arrow_type(pa, kind)) for column, _, kind in COLUMNS[table]]
+        + [(column, pa.float64()) for column in BBOX_COLUMNS]
+    )
+
+
+def to_batch(pa, target, table, rows):
+    size = len(COLUMNS[table])
+    columns = list(zip(*[row[:size] for row in rows]))
+    xyxy = np.array([row[size:] for row in rows], dtype=np.float64)
+    missing = np.flatnonzero(np.isnan(xyxy[:, 0]))
+    if len(missing):
+        polygons = columns[[column for column, _, _ in COLUMNS[table]].index('polygon')]
+        xyxy[missing] = polys2xyxy([polygons[i] for i in missing])
+
+    arrays = [pa.array(values, type=field.type) for values, field in zip(columns, target)]
+    # NaN boxes of empty polygons are stored as nulls
+    arrays += [pa.array(xyxy[:, i], type=pa.float64(), from_pandas=True) for i in range(len(BBOX_COLUMNS))]
+    return pa.RecordBatch.from_arrays(arrays, schema=target)
+
+def record_batches(table, queryset, chunk_size=COLUMNAR_CHUNK_SIZE):
+    """
+    Yield the rows of queryset as record batches of chunk_size rows, read with a server-side
+    cursor, so that a single chunk is held in memory.
+    """
+    pa = require_pyarrow()
+    target = schema(table)
+    rows = []
+    for row in queryset.values_list(*[lookup for _, lookup, _ in COLUMNS[table]], *BBOX_LOOKUPS[table]).iterator(chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            yield to_batch(pa, target, table, rows)
+            rows = []
+
+    if rows:
+        yield to_batch(pa, target, table, rows)
+
+
+def open_writer(export_format, sink, target):
+    pa = require_pyarrow()
+    if export_format == 'parquet':
+        return pa.parquet.ParquetWriter(sink, target, compression='zstd')
+    return pa.ipc.new_file(sink, target)
+
+def write_table(table, queryset, export_format, sink):
+    """
+    Write the rows of queryset to the file object sink as parquet, one row group per chunk, or as
+    an arrow IPC file, one record batch per chunk. Return the number of rows written.
+    """
+    count = 0
+    writer = open_writer(export_format, sink, schema(table))
+    try:
+        for batch in record_batches(table, queryset):
+            writer.write_batch(batch)
+            count += batch.num_rows
+    finally:
+        writer.close()
+    return count
+
+
+class QueueSink:
+    """
+    Write-only file object passing the bytes written to put, by blocks of COLUMNAR_SINK_BLOCK bytes.
+    """
+
+    def __init__(self, put):
+        self.put = put
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        self.buffer += data
+        self.position += len(data)
+        if len(self.buffer) >= COLUMNAR_SINK_BLOCK:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
+
+
+def partition_path(output, table, day, edge_box_id, export_format):
+    return os.path.join(output, table, f"day={day.isoformat()}", f"edge_box={edge_box_id}", f"part-0.{export_format}")
+
+def export_partitions(table, from_date, to_date, output, export_format='parquet'):
+    """
+    Write the rows of table created from from_date to to_date, both included, to one file per day
+    and edge box under output/<table>/day=<day>/edge_box=<edge_box_id>/ (hive partitioning).
+    Existing files are replaced. Yield the path and the number of rows of each file.
+    """
+    model = TABLES[table]
+    day = from_date
+    while day <= to_date:
+        start = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+        rows = model.objects.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+        edge_box_ids = list(rows.order_by().values_list('edge_box__edge_box_id', flat=True).distinct())
+        for edge_box_id in edge_box_ids:
+            path = partition_path(output, table, day, edge_box_id, export_format)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", 'wb') as sink:
+                count = write_table(
+                    table, rows.filter(edge_box__edge_box_id=edge_box_id).order_by('created_at', 'id'), export_format, sink
+                )
+            os.replace(f"{path}.tmp", path)
+            yield path, count
+
+        day += timedelta(days=1)
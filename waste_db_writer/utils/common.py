@@ -1,15 +1,15 @@
 import os
-import cv2
 import django
 import logging
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery
 django.setup()
-import numpy as np
 from fastapi import HTTPException
 from datetime import datetime, timezone,timedelta
 from database.models import PlantInfo, EdgeBoxInfo
 from database.models import WasteSegments, WasteImpurity, WasteDust, WasteHotSpot
 from database.models import WasteFeedback
+from database.cache import cached_edge_box
+from utils.roi import CompiledROIs
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 red_square = '🟥'
@@ -36,34 +36,47 @@ def get_box_info(edge_box_id=None):
     if edge_box_id is None:
         edge_box_id = os.environ.get('EDGE_BOX_ID')
     try:
-        edge_box = EdgeBoxInfo.objects.get(edge_box_id=edge_box_id)
+        edge_box = cached_edge_box(edge_box_id)
     except:
         raise HTTPException(status_code=500, detail=f'edge box id not Found {edge_box_id}')
     
     return edge_box
 
 
+def with_latest_feedback(queryset):
+    """
+    Annotate each event with the ack_status and rating of its latest feedback, None if it has no
+    feedback, so that the feedback is read in the same query as the events.
+    """
+    latest_feedback = WasteFeedback.objects.filter(event_uid=OuterRef('event_uid')).order_by('-created_at')
+    return queryset.annotate(
+        feedback_ack_status=Subquery(latest_feedback.values('ack_status')[:1]),
+        feedback_rating=Subquery(latest_feedback.values('rating')[:1]),
+    )
+
+
 def get_impurity_info(filters):
     data = []
-    event_ids = []
+    event_ids = set()
     try:
         filters &= Q(is_problematic=True)
-        waste_impurity = WasteImpurity.objects.filter(filters).order_by('-created_at')
+        waste_impurity = with_latest_feedback(WasteImpurity.objects.filter(filters)).order_by('-created_at')
         for wi in waste_impurity:
             delivery_id = wi.delivery_id
             meta_info = wi.meta_info if wi.meta_info is not None else {}
             delivery_id = mappig_delivery(delivery_id=delivery_id, region=meta_info.get('region'))
             severity_level = mapping_flag[int(wi.severity_level)]
             
+            # region stored at write time, meta_info for the rows written before it
             region = "~Bunker"
-            if 'region' in meta_info.keys():
-                region = meta_info.get('region') if region.lower() == "tor05" else f"~{meta_info.get('region')}"
+            region_name = wi.region or meta_info.get('region')
+            if region_name:
+                region = f"~{region_name}"
             
             ack_status = False
-            if WasteFeedback.objects.filter(event_uid = wi.event_uid).exists():
-                waste_feedback = WasteFeedback.objects.filter(event_uid = wi.event_uid).order_by('-created_at').first()
-                ack_status = waste_feedback.ack_status
-                severity_level = mapping_flag[int(waste_feedback.rating)]
+            if wi.feedback_ack_status is not None:
+                ack_status = wi.feedback_ack_status
+                severity_level = mapping_flag[int(wi.feedback_rating)]
                 
                 if not ack_status:
                     continue
@@ -90,7 +103,7 @@ def get_impurity_info(filters):
             }
             
             data.append(row)
-            event_ids.append(wi.event_uid)
+            event_ids.add(wi.event_uid)
     except Exception as err:
         raise HTTPException(status_code=500, detail=f'impurity data not Found: {err}')
     
@@ -100,7 +113,7 @@ def get_impurity_info(filters):
 def get_dust_info(filters):
     data = []
     try:
-        waste_dust = WasteDust.objects.filter(filters).order_by('-created_at')
+        waste_dust = with_latest_feedback(WasteDust.objects.filter(filters)).order_by('-created_at')
         for wi in waste_dust:
         
             delivery_id = wi.delivery_id
@@ -113,10 +126,9 @@ def get_dust_info(filters):
                 region = meta_info.get('region') if region.lower() == "tor05" else f"~{meta_info.get('region')}"
             
             ack_status = False
-            if WasteFeedback.objects.filter(event_uid = wi.event_uid).exists():
-                waste_feedback = WasteFeedback.objects.filter(event_uid = wi.event_uid).order_by('-created_at').first()
-                ack_status = waste_feedback.ack_status
-                severity_level = mapping_flag[int(waste_feedback.rating)]
+            if wi.feedback_ack_status is not None:
+                ack_status = wi.feedback_ack_status
+                severity_level = mapping_flag[int(wi.feedback_rating)]
                 
                 if not ack_status:
                     continue
@@ -149,7 +161,7 @@ def get_dust_info(filters):
 def get_hotspot_info(filters):
     data = []
     try:
-        waste_hotspot = WasteHotSpot.objects.filter(filters).order_by('-created_at')
+        waste_hotspot = with_latest_feedback(WasteHotSpot.objects.filter(filters)).order_by('-created_at')
         for wi in waste_hotspot:
         
             delivery_id = wi.delivery_id
@@ -161,10 +173,9 @@ def get_hotspot_info(filters):
             if 'region' in meta_info.keys():
                 region = meta_info.get('region') if region.lower() == "tor05" else f"~{meta_info.get('region')}"
             ack_status = False
-            if WasteFeedback.objects.filter(event_uid = wi.event_uid).exists():
-                waste_feedback = WasteFeedback.objects.filter(event_uid = wi.event_uid).order_by('-created_at').first()
-                ack_status = waste_feedback.ack_status
-                severity_level = mapping_flag[int(waste_feedback.rating)]
+            if wi.feedback_ack_status is not None:
+                ack_status = wi.feedback_ack_status
+                severity_level = mapping_flag[int(wi.feedback_rating)]
                 
                 if not ack_status:
                     continue
@@ -238,27 +249,9 @@ def map_object_to_gate(xyxyn, rois):
     >>> rois = {'Zone1': {'coords': [0.0, 0.0, 0.5, 0.5], 'color': (255, 0, 0)}}
     >>> map_objects_to_rois(objects, rois)
     {'bbxes': [[0.1, 0.2, 0.3, 0.4]], 'region': ['Zone1'], 'color': [(255, 0, 0)]}
+
+    The ROIs are compiled on each call, use utils.roi.compiled_rois() to map many objects.
     """ 
     
-    region = 'Bunker'
-    fake_size = 1000
-    xyxy = np.array([(int(xyxyn[i] * fake_size), int(xyxyn[i + 1] * fake_size)) for i in range(0, len(xyxyn), 2)]).flatten().tolist()
-    xmin, ymin, xmax, ymax = xyxy
-    center_x, center_y = (xmin + xmax) // 2, (ymax + ymin) // 2
-    for roi_name, roi_info in rois.items():
-        assert (np.array(roi_info['coords']) <= 1).all(), f'non-normalized or out of bounds coordinate of ROI: {roi_name}'
-        
-        polygon = [(roi_info['coords'][i], roi_info['coords'][i+1]) for i in range(0, len(roi_info['coords']), 2)]
-        
-        polygon = [(int(x * fake_size), int(y * fake_size)) for x, y in polygon]
-        polygon = np.array(polygon, np.int32)
-        polygon = polygon.reshape((-1, 1, 2))
-        
-        inside = cv2.pointPolygonTest(polygon, (center_x, center_y), True)
-        
-        if inside>0:
-            region = roi_name
-            break
-
-    return region
+    return CompiledROIs(rois).region(xyxyn)
 
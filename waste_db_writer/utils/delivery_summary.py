@@ -0,0 +1,164 @@
+import heapq
+from django.db import transaction
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from database.models import WasteImpurity, WasteDust, WasteHotSpot, DeliverySummary
+
+EVENT_MODELS = {
+    'impurity': WasteImpurity,
+    'dust': WasteDust,
+    'hotspot': WasteHotSpot,
+}
+EVENT_NAMES = {model: event for event, model in EVENT_MODELS.items()}
+
+EVENT_FIELDS = ('id', 'edge_box_id', 'timestamp', 'delivery_id', 'event_uid', 'severity_level', 'img_id', 'img_file')
+
+
+def has_delivery(delivery_id):
+    # 'null' is sent by the edge boxes for the events without delivery, see utils.common.mappig_delivery
+    return bool(delivery_id) and str(delivery_id) != 'null'
+
+def summarize(rows, counted=()):
+    """
+    Fold event rows (WasteImpurity, WasteDust or WasteHotSpot, in the order they were written) into
+    a dict of delivery_id: unsaved DeliverySummary, and return it. The rows without delivery are
+    skipped, the object_uid of the impurities is read for the longest object.
+
+    The counts are numbers of events, distinct event_uid: an impurity event has one row per object.
+    counted holds the (event, event_uid) already counted, which are not counted again.
+    """
+    summaries = {}
+    seen = set(counted)
+    for row in rows:
+        if not has_delivery(row.delivery_id):
+            continue
+
+        summary = summaries.get(row.delivery_id)
+        if summary is None:
+            summary = summaries[row.delivery_id] = DeliverySummary(
+                delivery_id=row.delivery_id, edge_box_id=row.edge_box_id, first_seen=row.timestamp, last_seen=row.timestamp,
+            )
+
+        event = EVENT_NAMES[type(row)]
+        if (event, row.event_uid) not in seen:
+            seen.add((event, row.event_uid))
+            setattr(summary, f'{event}_count', getattr(summary, f'{event}_count') + 1)
+        summary.first_seen = min(summary.first_seen, row.timestamp)
+        summary.last_seen = max(summary.last_seen, row.timestamp)
+        if summary.max_severity is None or row.severity_level > summary.max_severity:
+            summary.max_severity = row.severity_level
+            summary.event_uid = row.event_uid
+            summary.img_id = row.img_id
+            summary.img_file = row.img_file
+
+        if event == 'impurity':
+            segment = row.object_uid
+            if summary.longest_object is None or segment.object_length > summary.longest_object:
+                summary.longest_object = segment.object_length
+                summary.longest_object_uid = segment.object_uid
+
+    return summaries
+
+def lock_summaries(rows):
+    """
+    Create the missing summaries of the deliveries of rows, INSERTs ignored if they exist, and lock
+    them in delivery_id order until the end of the transaction.
+    """
+    created = {}
+    for row in rows:
+        created.setdefault(row.delivery_id, DeliverySummary(
+            delivery_id=row.delivery_id, edge_box_id=row.edge_box_id, first_seen=row.timestamp, last_seen=row.timestamp,
+        ))
+    DeliverySummary.objects.bulk_create(list(created.values()), ignore_conflicts=True)
+    list(
+        DeliverySummary.objects.select_for_update()
+        .filter(delivery_id__in=list(created)).order_by('delivery_id').values_list('id', flat=True)
+    )
+
+def apply_summary(summary):
+    """
+    Add summary, of events not counted yet, to the stored summary of its delivery, created by
+    lock_summaries: one UPDATE of the counts and time range, and one per improved severity or object
+    length. Each UPDATE compares with the stored row, so concurrent writers of the same delivery do
+    not lose each other's events.
+    """
+    stored = DeliverySummary.objects.filter(delivery_id=summary.delivery_id)
+    stored.update(
+        first_seen=Least('first_seen', Value(summary.first_seen, output_field=DateTimeField())),
+        last_seen=Greatest('last_seen', Value(summary.last_seen, output_field=DateTimeField())),
+        impurity_count=F('impurity_count') + summary.impurity_count,
+        dust_count=F('dust_count') + summary.dust_count,
+        hotspot_count=F('hotspot_count') + summary.hotspot_count,
+        updated_at=timezone.now(),
+    )
+    if summary.max_severity is not None:
+        stored.filter(Q(max_severity__isnull=True) | Q(max_severity__lt=summary.max_severity)).update(
+            max_severity=summary.max_severity, event_uid=summary.event_uid, img_id=summary.img_id, img_file=summary.img_file,
+        )
+    if summary.longest_object is not None:
+        stored.filter(Q(longest_object__isnull=True) | Q(longest_object__lt=summary.longest_object)).update(
+            longest_object=summary.longest_object, longest_object_uid=summary.longest_object_uid,
+        )
+
+def counted_events(rows):
+    """
+    Return the (event, event_uid) of the rows that were already written by an earlier call, e.g. the
+    other objects of an impurity event, read with the event_uid indexes.
+    """
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(type(row), []).append(row)
+
+    counted = set()
+    for model, model_rows in by_model.items():
+        earlier = (
+            model.objects.filter(event_uid__in={row.event_uid for row in model_rows})
+            .exclude(id__in=[row.id for row in model_rows])
+            .values_list('event_uid', flat=True).distinct()
+        )
+        counted.update((EVENT_NAMES[model], event_uid) for event_uid in earlier)
+    return counted
+
+def summarize_events(rows):
+    """
+    Count new event rows in the summaries of their deliveries. Call it in the transaction writing
+    the events, after writing them, so that the summaries commit with them.
+
+    The summaries are locked before the earlier rows of the events are read: a concurrent writer of
+    other objects of the same impurity event waits until this one commits, then sees its rows and
+    does not count the event a second time.
+    """
+    rows = [row for row in rows if has_delivery(row.delivery_id)]
+    if not rows:
+        return
+
+    # always in the same order, two writers of the same deliveries wait for each other instead of deadlocking
+    lock_summaries(rows)
+    summaries = summarize(rows, counted=counted_events(rows))
+    for delivery_id in sorted(summaries):
+        apply_summary(summaries[delivery_id])
+
+
+def rebuild_summaries(delivery_ids):
+    """
+    Rebuild the summaries of delivery_ids from their events, which repairs summaries missed by the
+    writers, e.g. for events written or deleted outside of them. Return the number of summaries written.
+    """
+    events = []
+    for event, model in EVENT_MODELS.items():
+        rows = model.objects.filter(delivery_id__in=delivery_ids).order_by('timestamp', 'id')
+        if event == 'impurity':
+            rows = rows.select_related('object_uid').only(*EVENT_FIELDS, 'object_uid__object_uid', 'object_uid__object_length')
+        else:
+            rows = rows.only(*EVENT_FIELDS)
+        events.append(rows.iterator(chunk_size=2000))
+
+    # the events of the three tables in time order, the first event of the highest severity is the representative one
+    summaries = summarize(heapq.merge(*events, key=lambda row: row.timestamp))
+
+    with transaction.atomic():
+        DeliverySummary.objects.filter(delivery_id__in=delivery_ids).delete()
+        DeliverySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+    return len(summaries)
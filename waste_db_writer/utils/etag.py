@@ -0,0 +1,62 @@
+import json
+import inspect
+import hashlib
+import functools
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1(json.dumps(jsonable_encoder(parts), sort_keys=True).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def strong(tag):
+    return tag[2:] if tag.startswith('W/') else tag
+
+def matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+
+    tags = [strong(tag.strip()) for tag in if_none_match.split(',')]
+    return '*' in tags or strong(etag) in tags
+
+
+def conditional(validator):
+    """
+    Add an ETag to the responses of a data_api endpoint taking (response, **params), and answer
+    304 Not Modified without running the endpoint when the If-None-Match header of the request matches.
+
+    validator(**params) returns the ETag of the response the endpoint would give, or None to
+    skip the check. It runs before the endpoint, so a change committed in between leads at worst
+    to a stale ETag on a fresh response, never the reverse.
+
+    The ETag is set on the response before the endpoint runs. utils.response_cache.cached_response
+    keys its entries on it, so a cached body is only served with the ETag it was read under, and a
+    new ETag always comes with a body read after it.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        def wrapper(request: Request, response: Response, **params):
+            try:
+                etag = validator(**params)
+            except Exception as err:
+                print(f"Failed to compute ETag: {err}")
+                etag = None
+
+            if etag and matches(request.headers.get('if-none-match'), etag):
+                return Response(status_code=304, headers={'ETag': etag})
+
+            if etag:
+                response.headers['ETag'] = etag
+            results = endpoint(response=response, **params)
+            if etag and response.status_code not in (None, 200):
+                del response.headers['ETag']
+            return results
+
+        signature = inspect.signature(endpoint)
+        wrapper.__signature__ = signature.replace(
+            parameters=[inspect.Parameter('request', inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request)]
+            + list(signature.parameters.values())
+        )
+        return wrapper
+    return decorator
@@ -0,0 +1,133 @@
+import io
+import os
+import csv
+import json
+import queue
+import threading
+from django.db import connection
+from fastapi.responses import StreamingResponse
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+EXPORT_FLUSH_ROWS = int(os.environ.get('EXPORT_FLUSH_ROWS', 500))
+EXPORT_QUEUE_SIZE = int(os.environ.get('EXPORT_QUEUE_SIZE', 8))
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+FORMATS = tuple(MEDIA_TYPES.keys())
+
+_done = object()
+
+
+def encode_ndjson(rows, fieldnames):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+def encode_csv(rows, fieldnames):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[field]) if isinstance(row[field], (list, tuple, dict)) else row[field]
+            for field in fieldnames
+        ])
+    return buffer.getvalue()
+
+ENCODERS = {
+    'ndjson': encode_ndjson,
+    'csv': encode_csv,
+}
+
+
+class Stopped(Exception):
+    """
+    Raised by put() in the producer thread when the consumer is closed.
+    """
+
+
+def stream_from_thread(produce):
+    """
+    Run produce(put) in a producer thread and yield the blocks it puts.
+
+    The blocks go through a bounded queue, so at most EXPORT_QUEUE_SIZE of them are held in memory
+    whatever the size of the export. When the consumer is closed, e.g. when the client disconnects,
+    put() raises Stopped and the producer unwinds. The database connection of the thread is closed
+    at the end.
+    """
+    blocks = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise Stopped()
+
+    def run():
+        try:
+            produce(put)
+            put(_done)
+        except Stopped:
+            pass
+        except Exception as err:
+            try:
+                put(err)
+            except Stopped:
+                pass
+        finally:
+            connection.close()
+
+    threading.Thread(target=run, daemon=True).start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is _done:
+                break
+            if isinstance(block, Exception):
+                # the status is already sent, the export ends short
+                print(f"Export failed: {block}")
+                break
+            yield block
+    finally:
+        stop.set()
+
+
+def stream_queryset(queryset, serialize, encode, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the rows of queryset, serialized and encoded by blocks of EXPORT_FLUSH_ROWS rows, read
+    with a server-side cursor (iterator) in a producer thread.
+    """
+    def produce(put):
+        rows = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            rows.append(serialize(obj))
+            if len(rows) >= EXPORT_FLUSH_ROWS:
+                put(encode(rows))
+                rows = []
+
+        if rows:
+            put(encode(rows))
+
+    return stream_from_thread(produce)
+
+
+def export_response(queryset, serialize, export_format:str, fieldnames, filename:str):
+    """
+    StreamingResponse of queryset in export_format (ndjson or csv), serialize turns an object into
+    a dict with the keys fieldnames.
+    """
+    encode = lambda rows: ENCODERS[export_format](rows, fieldnames)
+
+    def content():
+        if export_format == 'csv':
+            yield encode_csv([dict(zip(fieldnames, fieldnames))], fieldnames)
+        yield from stream_queryset(queryset, serialize, encode)
+
+    return StreamingResponse(
+        content(),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="{filename}.{export_format}"'},
+    )
@@ -0,0 +1,64 @@
+import json
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+NEXT = 'next'
+PREV = 'prev'
+
+
+def encode_cursor(row, direction:str):
+    raw = json.dumps({'c': row.created_at.isoformat(), 'i': row.pk, 'd': direction})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor:str):
+    """
+    Decode an opaque cursor into (created_at, id, direction). Raises ValueError if the cursor is invalid.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+        created_at, pk, direction = datetime.fromisoformat(data['c']), int(data['i']), data['d']
+    except Exception as err:
+        raise ValueError(f'invalid cursor {cursor}: {err}')
+
+    if direction not in (NEXT, PREV):
+        raise ValueError(f'invalid cursor direction {direction}')
+
+    return created_at, pk, direction
+
+
+def keyset_page(queryset, cursor:str=None, limit:int=15, descending:bool=True):
+    """
+    Return one page of queryset ordered on (created_at, id), as (rows, next_cursor, prev_cursor).
+
+    An empty cursor returns the first page. The page after or before a cursor is read with a
+    (created_at, id) range condition instead of an OFFSET, so every page costs the same index
+    scan however deep it is, and rows inserted meanwhile are neither repeated nor skipped.
+
+    Both cursors are returned for every non-empty page, an empty page returns the given cursor so
+    that a client polling for new rows can keep using it.
+    """
+    order = ('-created_at', '-id') if descending else ('created_at', 'id')
+    reverse = ('created_at', 'id') if descending else ('-created_at', '-id')
+
+    direction = NEXT
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+        after = (direction == NEXT) == descending
+        if after:
+            # rows that come before (created_at, id)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+
+    if direction == NEXT:
+        rows = list(queryset.order_by(*order)[:limit])
+    else:
+        rows = list(queryset.order_by(*reverse)[:limit])[::-1]
+
+    if not rows:
+        return rows, cursor if direction == NEXT else None, cursor if direction == PREV else None
+
+    return rows, encode_cursor(rows[-1], NEXT), encode_cursor(rows[0], PREV)
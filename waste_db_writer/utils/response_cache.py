@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import functools
+from datetime import datetime, timedelta, timezone
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+# off, redis or memory. The memory backend is local to the process, the writers cannot invalidate it.
+RESPONSE_CACHE = os.environ.get('RESPONSE_CACHE', 'off').lower()
+RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/1')
+RESPONSE_CACHE_TTL_TODAY = int(os.environ.get('RESPONSE_CACHE_TTL_TODAY', 10))
+RESPONSE_CACHE_TTL_PAST = int(os.environ.get('RESPONSE_CACHE_TTL_PAST', 24 * 3600))
+RESPONSE_CACHE_LOCK_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_LOCK_TIMEOUT', 30))
+PREFIX = 'response'
+
+
+class RedisBackend:
+    def __init__(self, url):
+        import redis
+        import redis_lock
+        self.redis = redis.Redis.from_url(url)
+        self.redis_lock = redis_lock
+
+    def get(self, key):
+        return self.redis.get(key)
+
+    def set(self, key, value, ttl):
+        self.redis.set(key, value, ex=ttl)
+
+    def generation(self, key):
+        return int(self.redis.get(key) or 0)
+
+    def bump(self, key, ttl):
+        with self.redis.pipeline() as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl)
+            pipe.execute()
+
+    def lock(self, key):
+        return self.redis_lock.Lock(self.redis, key, expire=RESPONSE_CACHE_LOCK_TIMEOUT, auto_renewal=True)
+
+
+class MemoryBackend:
+    MAXSIZE = 1024
+    LOCKS = 64
+
+    def __init__(self):
+        self._values = {}
+        self._locks = [threading.Lock() for _ in range(self.LOCKS)]
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._values.get(key, (None, 0))
+            return value if expires_at > time.monotonic() else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._values) >= self.MAXSIZE:
+                self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            self._values[key] = (value, now + ttl)
+
+    def generation(self, key):
+        return int(self.get(key) or 0)
+
+    def bump(self, key, ttl):
+        with self._lock:
+            value, _ = self._values.get(key, (0, 0))
+            self._values[key] = (value + 1, time.monotonic() + ttl)
+
+    def lock(self, key):
+        # striped locks, two keys may share a lock
+        return self._locks[hash(key) % self.LOCKS]
+
+
+def create_backend():
+    if RESPONSE_CACHE == 'redis':
+        return RedisBackend(RESPONSE_CACHE_URL)
+    if RESPONSE_CACHE == 'memory':
+        return MemoryBackend()
+    return None
+
+backend = create_backend()
+
+
+def generation_key(day):
+    return f"{PREFIX}:generation:{day.isoformat()}"
+
+def today():
+    return datetime.now(tz=timezone.utc).date()
+
+def bump_generation():
+    """
+    Invalidate the cached responses that cover the current day. Called by the writers once the
+    events of the day are committed, a failure only delays the refresh until the short TTL expires.
+    """
+    if backend is None:
+        return
+
+    try:
+        backend.bump(generation_key(today()), ttl=2 * 24 * 3600)
+    except Exception as err:
+        print(f"Failed to invalidate response cache: {err}")
+
+def is_live(params):
+    """
+    A response is live if new events can change it: it covers the current day, or it is selected
+    by delivery_id or event_uid rather than by a date range. Events are only written for the
+    current day, so the response for past days only changes when events are edited.
+    """
+    if params.get('delivery_id') or params.get('event_uid'):
+        return True
+
+    from_date, to_date = params.get('from_date'), params.get('to_date')
+    if from_date is None or to_date is None:
+        return True
+
+    # the endpoints read up to the day after to_date
+    return to_date.date() + timedelta(days=1) >= today()
+
+def cache_key(name, params, generation):
+    normalized = json.dumps(jsonable_encoder(params), sort_keys=True)
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"{PREFIX}:{name}:{generation}:{digest}"
+
+
+def cached_response(name:str, always_live:bool=False):
+    """
+    Cache the results of a data_api endpoint taking (response, **params), keyed by name and the
+    normalized params, and by the ETag already set on the response by utils.etag.conditional if
+    any. Only JSON results with status 200 are cached, a Response returned by the endpoint, e.g. a
+    streamed export, is passed through.
+
+    Live responses (see is_live) are cached for RESPONSE_CACHE_TTL_TODAY seconds under the generation
+    of the current day, which bump_generation() moves on, the others for RESPONSE_CACHE_TTL_PAST.
+    With always_live every response is live, for endpoints whose past responses change, e.g. the
+    alarm stats rebuilt by compact_alarm_rollups.
+    On a miss a lock per key lets a single request query the database, concurrent requests for the
+    same key wait for it and read its result.
+    """
+    def decorator(endpoint):
+        def read(response, key, live, **params):
+            cached = backend.get(key)
+            if cached is not None:
+                response.headers['X-Cache'] = 'HIT'
+                return json.loads(cached)
+
+            results = endpoint(response=response, **params)
+            if response.status_code in (None, 200) and not isinstance(results, Response):
+                try:
+                    backend.set(key, json.dumps(jsonable_encoder(results)), ttl=RESPONSE_CACHE_TTL_TODAY if live else RESPONSE_CACHE_TTL_PAST)
+                except Exception as err:
+                    print(f"Failed to cache response {key}: {err}")
+            return results
+
+        @functools.wraps(endpoint)
+        def wrapper(response: Response, **params):
+            if backend is None:
+                return endpoint(response=response, **params)
+
+            try:
+                live = always_live or is_live(params)
+                generation = backend.generation(generation_key(today())) if live else 'past'
+                # an entry is only read back under the validator it was read with
+                etag = response.headers.get('etag')
+                key = cache_key(name, params if etag is None else dict(params, etag=etag), generation)
+                cached = backend.get(key)
+                if cached is not None:
+                    response.headers['X-Cache'] = 'HIT'
+                    return json.loads(cached)
+
+                lock = backend.lock(f"{key}:lock")
+                lock.acquire()
+            except Exception as err:
+                print(f"Response cache unavailable, reading from the database: {err}")
+                return endpoint(response=response, **params)
+
+            try:
+                return read(response, key, live, **params)
+            finally:
+                lock.release()
+
+        return wrapper
+    return decorator
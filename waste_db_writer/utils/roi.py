@@ -0,0 +1,154 @@
+import threading
+import numpy as np
+
+DEFAULT_REGION = 'Bunker'
+ROI_SCALE = 1000
+
+
+class CompiledROIs:
+    """
+    Regions of interest compiled once for point-in-polygon tests, in place of one cv2.pointPolygonTest
+    per ROI and per object.
+
+    rois maps a region name to a dict with 'coords', the normalized polygon as a flat sequence
+    (x1, y1, x2, y2, ...), and 'color'. The polygons and the box centers are quantized on a grid of
+    ROI_SCALE like map_object_to_gate did, so both give the same regions. A center on the edge of a
+    polygon is outside of it, the first ROI containing the center wins and DEFAULT_REGION is given
+    to the objects outside of every ROI.
+    """
+
+    def __init__(self, rois, scale=ROI_SCALE):
+        self.scale = scale
+        self.names = []
+        self.colors = []
+        self.polygons = []
+        self.bounds = []
+        for roi_name, roi_info in rois.items():
+            coords = np.asarray(roi_info['coords'], dtype=np.float64)
+            assert (coords <= 1).all(), f'non-normalized or out of bounds coordinate of ROI: {roi_name}'
+
+            polygon = np.trunc(coords.reshape(-1, 2) * scale)
+            self.names.append(roi_name)
+            self.colors.append(roi_info.get('color'))
+            self.polygons.append(polygon)
+            self.bounds.append(np.concatenate([polygon.min(axis=0), polygon.max(axis=0)]))
+
+        # plain python copies for the single box path, where numpy calls cost more than the test
+        self._scalar = [
+            (tuple(bounds.tolist()), [tuple(vertex) for vertex in polygon.tolist()])
+            for polygon, bounds in zip(self.polygons, self.bounds)
+        ]
+
+    def __len__(self):
+        return len(self.names)
+
+    def centers(self, xyxyn):
+        """
+        Quantized centers of an array of normalized boxes (xmin, ymin, xmax, ymax), shape (n, 2).
+        """
+        xyxy = np.trunc(np.asarray(xyxyn, dtype=np.float64).reshape(-1, 4) * self.scale)
+        return np.floor_divide(xyxy[:, :2] + xyxy[:, 2:], 2)
+
+    @staticmethod
+    def contains(polygon, points):
+        """
+        Strict point-in-polygon test by ray casting, vectorized over points and edges.
+        """
+        px, py = points[:, :1], points[:, 1:]
+        ax, ay = polygon[:, 0], polygon[:, 1]
+        bx, by = np.roll(ax, -1), np.roll(ay, -1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crosses = ((ay > py) != (by > py)) & (px < ax + (py - ay) * (bx - ax) / (by - ay))
+        inside = np.logical_xor.reduce(crosses, axis=1)
+
+        on_edge = (
+            ((bx - ax) * (py - ay) == (by - ay) * (px - ax))
+            & (np.minimum(ax, bx) <= px) & (px <= np.maximum(ax, bx))
+            & (np.minimum(ay, by) <= py) & (py <= np.maximum(ay, by))
+        ).any(axis=1)
+        return inside & ~on_edge
+
+    def assign(self, xyxyn):
+        """
+        Return the index of the ROI of each box of xyxyn, an array of shape (n, 4), -1 outside of every ROI.
+        """
+        points = self.centers(xyxyn)
+        index = np.full(len(points), -1, dtype=np.int64)
+        for i, (polygon, bounds) in enumerate(zip(self.polygons, self.bounds)):
+            # only the centers within the bounding box of the ROI and not assigned yet are tested
+            candidates = np.flatnonzero(
+                (index < 0)
+                & (points[:, 0] >= bounds[0]) & (points[:, 1] >= bounds[1])
+                & (points[:, 0] <= bounds[2]) & (points[:, 1] <= bounds[3])
+            )
+            if len(candidates):
+                index[candidates[self.contains(polygon, points[candidates])]] = i
+        return index
+
+    def regions(self, xyxyn):
+        """
+        Return the region name of each box of xyxyn, an array of shape (n, 4).
+        """
+        names = np.array(self.names + [DEFAULT_REGION], dtype=object)
+        return names[self.assign(xyxyn)].tolist()
+
+    def region(self, xyxyn):
+        """
+        Return the region name of a single normalized box (xmin, ymin, xmax, ymax).
+        """
+        xmin, ymin, xmax, ymax = (int(v * self.scale) for v in xyxyn)
+        x, y = (xmin + xmax) // 2, (ymin + ymax) // 2
+        for name, (bounds, polygon) in zip(self.names, self._scalar):
+            if bounds[0] <= x <= bounds[2] and bounds[1] <= y <= bounds[3] and contains_point(polygon, x, y):
+                return name
+        return DEFAULT_REGION
+
+
+def contains_point(polygon, x, y):
+    """
+    Strict point-in-polygon test of a single point, the scalar counterpart of CompiledROIs.contains.
+    """
+    inside = False
+    for (ax, ay), (bx, by) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (bx - ax) * (y - ay) == (by - ay) * (x - ax) and min(ax, bx) <= x <= max(ax, bx) and min(ay, by) <= y <= max(ay, by):
+            return False
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+    return inside
+
+
+_compiled = {}
+_lock = threading.Lock()
+
+def compiled_rois(edge_box=None):
+    """
+    Return the CompiledROIs of edge_box, from the 'rois' of its meta_info, or of utils.common.rois()
+    without edge box or config. They are compiled again when the config of the edge box changes.
+    """
+    from utils.common import rois
+
+    config = (edge_box.meta_info or {}).get('rois') if edge_box is not None else None
+    key = edge_box.edge_box_id if config else None
+    if config is None:
+        config = rois()
+
+    with _lock:
+        entry = _compiled.get(key)
+        if entry is None or entry[0] != config:
+            entry = (config, CompiledROIs(config))
+            _compiled[key] = entry
+    return entry[1]
+
+def assign_regions(xyxyn, edge_box=None):
+    """
+    Return the region of each box of xyxyn, an array of shape (n, 4), with the ROIs of edge_box.
+    A box of NaN, from an empty polygon, gets None.
+    """
+    xyxyn = np.asarray(xyxyn, dtype=np.float64).reshape(-1, 4)
+    valid = np.flatnonzero(~np.isnan(xyxyn).any(axis=1))
+    regions = [None] * len(xyxyn)
+    if len(valid):
+        for i, region in zip(valid.tolist(), compiled_rois(edge_box).regions(xyxyn[valid])):
+            regions[i] = region
+    return regions
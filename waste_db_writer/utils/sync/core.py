@@ -1,45 +1,70 @@
 import os
 from utils.api.base import BaseAPI
 from utils.common import DATETIME_FORMAT
+from database.models import SyncOutbox
 
 base_api = BaseAPI()
 
-def sync_to_alarm(url:str, model, event_name:str, meta_info=None):
-    try:
-        base_api.post(
-            url=url,
-            payload={
+SYNC_URL = f"http://{os.getenv('EDGE_CLOUD_SYNC_HOST', '0.0.0.0')}:{os.getenv('EDGE_CLOUD_SYNC_PORT', '27092')}/api/v1/data"
+
+def alarm_payloads(model, event_name:str, meta_info=None):
+    """
+    Build the payloads sent to edge cloud sync for an event: the alarm and, if the event
+    belongs to a delivery, the delivery flag.
+    """
+    payloads = [
+        {
+            'event_id': model.event_uid,
+            "source_id": "waste-db-writer",
+            "target": "alarm",
+            "data": {
+                "tenant_domain": model.edge_box.plant.domain,
+                "delivery_id": str(model.delivery_id) if model.delivery_id else '',
+                "location": model.location if model.location is not None else model.edge_box.edge_box_location,
+                "flag_type": f"{event_name}",
+                "severity_level": str(model.severity_level),
+                "timestamp": model.timestamp.strftime(DATETIME_FORMAT),
+                "event_uid": model.event_uid,
+                "meta_info": meta_info,
+            }
+        }
+    ]
+
+    if model.delivery_id:
+        payloads.append(
+            {
                 'event_id': model.event_uid,
                 "source_id": "waste-db-writer",
-                "target": "alarm",
+                "target": "delivery/flag",
                 "data": {
-                    "tenant_domain": model.edge_box.plant.domain,
-                    "delivery_id": str(model.delivery_id) if model.delivery_id else '',
-                    "location": model.location if model.location is not None else model.edge_box.edge_box_location,
-                    "flag_type": f"{event_name}",
+                    "delivery_id": str(model.delivery_id),
+                    "flag_type": "impurity",
                     "severity_level": str(model.severity_level),
-                    "timestamp": model.timestamp.strftime(DATETIME_FORMAT),
                     "event_uid": model.event_uid,
-                    "meta_info": meta_info,
                 }
             }
         )
-        
-        if model.delivery_id:
-            base_api.post(
-                url=url,
-                payload={
-                    'event_id': model.event_uid,
-                    "source_id": "waste-db-writer",
-                    "target": "delivery/flag",
-                    "data": {
-                        "delivery_id": str(model.delivery_id),
-                        "flag_type": "impurity",
-                        "severity_level": str(model.severity_level),
-                        "event_uid": model.event_uid,
-                    }
-                }
-            )
+
+    return payloads
+
+def sync_to_alarm(url:str, model, event_name:str, meta_info=None):
+    try:
+        for payload in alarm_payloads(model=model, event_name=event_name, meta_info=meta_info):
+            base_api.post(url=url, payload=payload)
     except Exception as err:
         raise ValueError(f"Error in sync: {err}")
 
+def enqueue_sync(model, event_name:str, meta_info=None):
+    """
+    Write the sync payloads of an event to the outbox. Call it inside the transaction that saves
+    the event, the dispatcher (utils.sync.dispatcher) delivers them.
+    """
+    try:
+        SyncOutbox.objects.bulk_create(
+            [
+                SyncOutbox(event_uid=model.event_uid, target=payload['target'], payload=payload)
+                for payload in alarm_payloads(model=model, event_name=event_name, meta_info=meta_info)
+            ]
+        )
+    except Exception as err:
+        raise ValueError(f"Error in sync outbox: {err}")
@@ -0,0 +1,156 @@
+import os
+import time
+from datetime import timedelta
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+from database.models import SyncOutbox
+from utils.api.base import APIError
+from utils.sync.core import base_api, SYNC_URL
+
+BATCH_SIZE = int(os.environ.get('SYNC_OUTBOX_BATCH_SIZE', 100))
+POLL_INTERVAL = float(os.environ.get('SYNC_OUTBOX_POLL_INTERVAL', 1.))
+BATCH_DELIVERY = os.environ.get('SYNC_OUTBOX_BATCH_DELIVERY', 'false').lower() in ('1', 'true', 'yes')
+BATCH_WINDOW = float(os.environ.get('SYNC_OUTBOX_BATCH_WINDOW', 0.5))
+MAX_BACKOFF = 300
+# seconds a claimed row stays hidden from the other dispatchers, longer than a send and its retries
+LEASE = float(os.environ.get('SYNC_OUTBOX_LEASE', 300))
+PURGE_INTERVAL = 3600
+
+# status codes of a receiver that does not accept array payloads
+BATCH_REJECTED = (400, 404, 405, 413, 415, 422)
+BATCH_RECHECK = 600
+
+batch_rejected_at = None
+
+def backoff(attempts):
+    return timedelta(seconds=min(2 ** attempts, MAX_BACKOFF))
+
+def batch_supported():
+    return batch_rejected_at is None or time.monotonic() - batch_rejected_at > BATCH_RECHECK
+
+def postpone(rows, err):
+    # recorded with the outcome of the batch, see dispatch_pending
+    for row in rows:
+        row.attempts += 1
+        row.last_error = str(err)
+        row.next_attempt_at = timezone.now() + backoff(row.attempts)
+
+def deliver_single(url, rows):
+    """
+    Send rows one payload per request. Stops at the first failure, returns False in that case.
+    """
+    for row in rows:
+        try:
+            base_api.post(url=url, payload=row.payload)
+        except Exception as err:
+            postpone([row], err)
+            print(f"Failed to deliver outbox row {row.id} ({row.target} {row.event_uid}): {err}")
+            return False
+
+        row.delivered_at = timezone.now()
+
+    return True
+
+def deliver_batch(url, rows):
+    """
+    Send rows of the same target as one array payload, fall back to single sends if the receiver
+    rejects arrays. Returns False if the rows could not be delivered.
+    """
+    global batch_rejected_at
+    if not batch_supported():
+        return deliver_single(url, rows)
+
+    try:
+        base_api.post(url=url, payload=[row.payload for row in rows])
+    except APIError as err:
+        if err.status_code not in BATCH_REJECTED:
+            postpone(rows, err)
+            print(f"Failed to deliver {len(rows)} outbox rows ({rows[0].target}): {err}")
+            return False
+
+        print(f"Receiver rejected batch payload, falling back to single sends: {err}")
+        batch_rejected_at = time.monotonic()
+        return deliver_single(url, rows)
+
+    batch_rejected_at = None
+    delivered_at = timezone.now()
+    for row in rows:
+        row.delivered_at = delivered_at
+
+    return True
+
+def dispatch_pending(url:str=SYNC_URL, batch_size:int=BATCH_SIZE, batched:bool=BATCH_DELIVERY):
+    """
+    Deliver one batch of pending outbox rows, oldest first, and mark them delivered.
+
+    Delivery is at least once: a row is marked only after the receiver accepted it. The batch stops
+    at the first failure, the failing rows are retried with an exponential backoff. In batched mode
+    the rows of each target are sent as one array payload.
+
+    No transaction is open while sending: the rows are claimed in a first short transaction, then
+    the outcome is recorded in a second one. A dispatcher that dies in between only delays its rows
+    until the LEASE expires.
+
+    Returns the number of rows delivered.
+    """
+    rows = claim(batch_size)
+    if not rows:
+        return 0
+
+    if batched:
+        targets = {}
+        for row in rows:
+            targets.setdefault(row.target, []).append(row)
+
+        for target_rows in targets.values():
+            if not deliver_batch(url, target_rows):
+                break
+    else:
+        deliver_single(url, rows)
+
+    # delivered and postponed rows are updated, the rows not sent after a failure get their
+    # next_attempt_at of before the claim back, which releases them
+    with transaction.atomic():
+        SyncOutbox.objects.bulk_update(rows, ['delivered_at', 'attempts', 'last_error', 'next_attempt_at'])
+
+    return len([row for row in rows if row.delivered_at])
+
+def claim(batch_size:int):
+    """
+    Claim a batch of pending rows by moving their next_attempt_at LEASE seconds ahead, so that the
+    other dispatchers skip them once the transaction is committed. The returned rows keep their
+    values of before the claim.
+    """
+    with transaction.atomic():
+        rows = list(
+            SyncOutbox.objects.select_for_update(skip_locked=True)
+            .filter(delivered_at__isnull=True, next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        SyncOutbox.objects.filter(id__in=[row.id for row in rows]).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=LEASE)
+        )
+
+    return rows
+
+def purge_delivered(days:int):
+    count, _ = SyncOutbox.objects.filter(delivered_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return count
+
+def run(url:str=SYNC_URL, batch_size:int=BATCH_SIZE, poll_interval:float=POLL_INTERVAL, retention_days:int=7,
+        batched:bool=BATCH_DELIVERY, batch_window:float=BATCH_WINDOW):
+    last_purge = 0
+    while True:
+        close_old_connections()
+        try:
+            delivered = dispatch_pending(url=url, batch_size=batch_size, batched=batched)
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purge_delivered(days=retention_days)
+                last_purge = time.monotonic()
+        except Exception as err:
+            print(f"Sync dispatcher error: {err}")
+            delivered = 0
+
+        if delivered < batch_size:
+            # in batched mode the wait is the window over which pending payloads are gathered
+            time.sleep(batch_window if batched and delivered else poll_interval)
@@ -0,0 +1,89 @@
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.test import SimpleTestCase
+from utils.api.base import BaseAPI, APIError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.server.hits.append(self.path)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/slow':
+            time.sleep(0.5)
+
+        body = b'{}'
+        self.send_response(500 if self.path == '/error' else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # the client of /slow is gone when the response is written
+        pass
+
+
+class BaseAPITest(SimpleTestCase):
+    """
+    BaseAPI against a local HTTP/1.1 stub server: one keep-alive connection per host, and only the
+    failures to connect are retried.
+    """
+
+    def setUp(self):
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        self.server.hits = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.host = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.api = BaseAPI(max_retries=2, backoff_factor=0., read_timeout=0.2)
+
+    def tearDown(self):
+        self.api.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_is_reused(self):
+        for i in range(5):
+            self.api.post(url=f'{self.host}/ok', payload={'i': i})
+
+        stats = self.api.stats()[self.host]
+        self.assertEqual(len(self.server.hits), 5)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['connections_reused'], 4)
+
+    def test_connect_failure_is_retried(self):
+        # a port nothing listens on
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            url = f'http://127.0.0.1:{sock.getsockname()[1]}/ok'
+
+        with self.assertRaises(APIError):
+            self.api.post(url=url, payload={})
+
+        stats = self.api.stats()['http://' + url.split('/')[2]]
+        self.assertEqual((stats['requests'], stats['retries']), (3, 2))
+
+    def test_server_error_is_not_retried(self):
+        with self.assertRaises(APIError) as error:
+            self.api.post(url=f'{self.host}/error', payload={})
+
+        self.assertEqual(error.exception.status_code, 500)
+        self.assertEqual(self.server.hits, ['/error'])
+        self.assertEqual(self.api.stats()[self.host]['retries'], 0)
+
+    def test_read_timeout_is_not_retried(self):
+        with self.assertRaises(APIError):
+            self.api.post(url=f'{self.host}/slow', payload={})
+
+        self.assertEqual(self.server.hits, ['/slow'])
+        self.assertEqual(self.api.stats()[self.host]['retries'], 0)